@@ -0,0 +1,462 @@
+import asyncio
+import httpx
+
+from .client import DEFAULT_UPLOAD_CHUNK_SIZE
+from .exceptions import NonUniqueException, NotFoundException
+from .retry import RetryPolicy
+from hashlib import md5
+from os import environ
+from time import perf_counter
+from urllib.parse import urlparse, parse_qs
+
+UPLOAD_REQUEST_RETRY_POLICY = RetryPolicy(max_attempts=1)
+
+
+class AsyncClient:
+    def __init__(
+        self,
+        elody_collection_url=None,
+        static_jwt=None,
+        extra_headers=None,
+        proxy=None,
+        *,
+        elody_storage_api_url=None,
+        max_concurrency=100,
+        max_keepalive_connections=20,
+        timeout=None,
+        upload_chunk_size=DEFAULT_UPLOAD_CHUNK_SIZE,
+        upload_progress_handler=None,
+        retry_policy=None,
+    ):
+        self.elody_collection_url = elody_collection_url or environ.get(
+            "ELODY_COLLECTION_URL", None
+        )
+        self.elody_storage_api_url = elody_storage_api_url or environ.get(
+            "ELODY_STORAGE_API_URL", None
+        )
+        self.static_jwt = static_jwt or environ.get("STATIC_JWT", None)
+        self.headers = {"Authorization": f"Bearer {self.static_jwt}"}
+        if extra_headers:
+            self.headers = {**self.headers, **extra_headers}
+        self.upload_chunk_size = upload_chunk_size
+        self.upload_progress_handler = upload_progress_handler
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.max_concurrency = max_concurrency
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.download_semaphore = asyncio.Semaphore(max(1, max_concurrency - 1))
+        self.session = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=max_concurrency,
+                max_keepalive_connections=max_keepalive_connections,
+            ),
+            proxy=proxy,
+            timeout=timeout,
+        )
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    async def close(self):
+        await self.session.aclose()
+
+    def __report_upload_progress(self, progress_handler, event, **data):
+        if progress_handler:
+            progress_handler(event, data)
+
+    async def __request(self, method, url, retry_policy=None, **kwargs):
+        retry_policy = retry_policy or self.retry_policy
+        request_start = perf_counter()
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                async with self.semaphore:
+                    response = await self.session.request(method, url, **kwargs)
+            except httpx.TransportError:
+                if not retry_policy.should_retry(
+                    method, attempt, perf_counter() - request_start
+                ):
+                    raise
+                await asyncio.sleep(retry_policy.get_delay(attempt))
+                continue
+            if not retry_policy.should_retry(
+                method, attempt, perf_counter() - request_start, response.status_code
+            ):
+                return response
+            await asyncio.sleep(retry_policy.get_delay(attempt, response))
+
+    async def __create_mediafile(self, entity_id, mediafile):
+        url = f"{self.elody_collection_url}/entities/{entity_id}/mediafiles"
+        headers = {**self.headers, **{"Accept": "text/uri-list"}}
+        response = await self.__request("POST", url, json=mediafile, headers=headers)
+        return self.__handle_response(response, "Failed to create mediafile", "text")
+
+    async def create_mediafile_with_filename(
+        self,
+        filename,
+        technical_origin="original",
+        original_filename=None,
+        institution_id=None,
+    ):
+        original_filename = original_filename or filename
+        data = {
+            "filename": filename,
+            "original_filename": original_filename,
+            "type": "mediafile",
+            "technical_origin": technical_origin,
+        }
+        if institution_id:
+            data.update({"metadata": [{"key": "institution", "value": institution_id}]})
+        req = await self.__request(
+            "POST",
+            f"{self.elody_collection_url}/mediafiles",
+            json=data,
+            headers=self.headers,
+        )
+        if req.status_code != 201:
+            raise Exception(req.text.strip())
+        return req
+
+    async def create_ticket(self, mediafile_name):
+        req = await self.__request(
+            "POST",
+            f"{self.elody_collection_url}/tickets",
+            json={"filename": mediafile_name},
+            headers=self.headers,
+        )
+        if req.status_code != 201:
+            raise Exception(req.text.strip())
+        return req.text.strip().replace('"', "")
+
+    async def __get_upload_location(
+        self,
+        entity_id,
+        filename,
+        is_public=True,
+        identifiers=None,
+        mediafile_object=None,
+    ):
+        if not identifiers:
+            identifiers = list()
+        if not mediafile_object:
+            mediafile_object = dict()
+        metadata = []
+        if is_public:
+            metadata = [
+                {
+                    "key": "publication_status",
+                    "value": "publiek",
+                }
+            ]
+        mediafile = {
+            **{
+                "filename": filename,
+                "metadata": metadata,
+                "identifiers": identifiers,
+            },
+            **mediafile_object,
+        }
+        return await self.__create_mediafile(entity_id, mediafile)
+
+    def __handle_response(self, response, error_message, response_type="json"):
+        if response.status_code == 409:
+            raise NonUniqueException(response.text.strip())
+        if response.status_code == 404:
+            raise NotFoundException(response.text.strip())
+        if response.status_code not in range(200, 300):
+            raise Exception(f"{error_message}: {response.text.strip()}")
+        match response_type:
+            case "json":
+                return response.json()
+            case "text":
+                return response.text.strip()
+            case _:
+                return response.json()
+
+    async def add_entity_mediafiles(self, identifier, payload):
+        url = f"{self.elody_collection_url}/entities/{identifier}/mediafiles"
+        response = await self.__request("POST", url, json=payload, headers=self.headers)
+        return self.__handle_response(response, "Failed to add mediafiles")
+
+    async def add_object(self, collection, payload, params=None):
+        url = f"{self.elody_collection_url}/{collection}"
+        response = await self.__request(
+            "POST", url, json=payload, headers=self.headers, params=params
+        )
+        return self.__handle_response(response, "Failed to add object")
+
+    async def add_object_metadata(self, collection, identifier, payload):
+        if collection == "entities":
+            url = f"{self.elody_collection_url}/{collection}/{identifier}/metadata"
+            payload = payload if isinstance(payload, list) else [payload]
+            response = await self.__request(
+                "PATCH", url, json=payload, headers=self.headers
+            )
+            if response.status_code == 400 and response.json()["message"].endswith(
+                "has no metadata"
+            ):
+                response = await self.__request(
+                    "POST", url, json=payload, headers=self.headers
+                )
+            return self.__handle_response(response, "Failed to add metadata")
+        else:
+            url = f"{self.elody_collection_url}/{collection}/{identifier}"
+            payload = {"metadata": payload if isinstance(payload, list) else [payload]}
+            response = await self.__request(
+                "PATCH", url, json=payload, headers=self.headers
+            )
+            return self.__handle_response(response, "Failed to add metadata")
+
+    async def delete_object(self, collection, identifier):
+        url = f"{self.elody_collection_url}/{collection}/{identifier}"
+        response = await self.__request("DELETE", url, headers=self.headers)
+        return self.__handle_response(response, "Failed to delete object", "text")
+
+    async def get_all_objects(self, collection):
+        url = f"{self.elody_collection_url}/{collection}"
+        response = await self.__request("GET", url, headers=self.headers)
+        return self.__handle_response(response, "Failed to get objects")
+
+    async def get_mediafiles_and_check_existence(self, mediafile_ids):
+        return list(
+            await asyncio.gather(
+                *[
+                    self.get_object("mediafiles", mediafile_id)
+                    for mediafile_id in mediafile_ids
+                ]
+            )
+        )
+
+    async def get_object(self, collection, identifier):
+        url = f"{self.elody_collection_url}/{collection}/{identifier}"
+        response = await self.__request("GET", url, headers=self.headers)
+        return self.__handle_response(response, "Failed to get object")
+
+    async def update_object(self, collection, identifier, payload, overwrite=True):
+        url = f"{self.elody_collection_url}/{collection}/{identifier}"
+        method = "PUT" if overwrite else "PATCH"
+        response = await self.__request(method, url, json=payload, headers=self.headers)
+        return self.__handle_response(response, "Failed to update object")
+
+    async def update_object_relations(self, collection, identifier, payload):
+        url = f"{self.elody_collection_url}/{collection}/{identifier}/relations"
+        response = await self.__request(
+            "PATCH", url, json=payload, headers=self.headers
+        )
+        return self.__handle_response(response, "Failed to update object relations")
+
+    async def upload_file_from_url(
+        self,
+        entity_id,
+        filename,
+        file_url,
+        identifiers=None,
+        upload_location_replace_map=None,
+        mediafile_object=None,
+        user_email=None,
+        *,
+        chunk_size=None,
+        progress_handler=None,
+    ):
+        if self.max_concurrency < 2:
+            raise ValueError("Uploads need a max_concurrency of at least 2")
+        progress_handler = progress_handler or self.upload_progress_handler
+        chunk_size = chunk_size or self.upload_chunk_size
+        if not identifiers:
+            identifiers = list()
+        if not upload_location_replace_map:
+            upload_location_replace_map = dict()
+        upload_location = await self.__get_upload_location(
+            entity_id, filename, False, identifiers, mediafile_object
+        )
+        for current_location, new_location in upload_location_replace_map.items():
+            upload_location = upload_location.replace(current_location, new_location)
+        upload_location = upload_location.replace('"', "")
+        if user_email and "&user_email" not in upload_location:
+            upload_location = f"{upload_location}&user_email={user_email}"
+        self.__report_upload_progress(
+            progress_handler, "upload_location", upload_location=upload_location
+        )
+
+        parsed_upload_location = urlparse(upload_location)
+        mediafile_id = parse_qs(parsed_upload_location.query).get("id", [None])[0]
+        if not mediafile_id:
+            raise ValueError(f"Could not extract mediafile_id from {upload_location}")
+
+        response = await self.__request(
+            "POST",
+            f"{self.elody_storage_api_url}/upload/init-stream",
+            params={"mediafile_id": mediafile_id},
+            headers=self.headers,
+        )
+        response.raise_for_status()
+        stream_info = response.json()
+
+        mediafile_md5sum = md5()
+        md5_state = None
+        chunks_info = []
+        upload_start = perf_counter()
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                if md5_state is not None:
+                    mediafile_md5sum = md5_state.copy()
+
+                response = await self.__request(
+                    "GET",
+                    f"{self.elody_storage_api_url}/upload/stream-status",
+                    retry_policy=UPLOAD_REQUEST_RETRY_POLICY,
+                    params=stream_info,
+                    headers=self.headers,
+                )
+                response.raise_for_status()
+                existing_chunks = {
+                    chunk["sequence_number"]: chunk["hash"]
+                    for chunk in response.json().get("uploaded_chunks", [])
+                }
+
+                max_uploaded_chunk = (
+                    max(existing_chunks.keys()) if existing_chunks else 0
+                )
+                start_byte = max_uploaded_chunk * chunk_size
+
+                download_headers = {}
+                if start_byte > 0 and existing_chunks:
+                    download_headers["Range"] = f"bytes={start_byte}-"
+
+                async with (
+                    self.download_semaphore,
+                    self.semaphore,
+                    self.session.stream(
+                        "GET", file_url, headers=download_headers
+                    ) as mediafile_stream,
+                ):
+                    mediafile_stream.raise_for_status()
+                    if mediafile_stream.status_code == 200 and start_byte > 0:
+                        self.__report_upload_progress(progress_handler, "range_ignored")
+                        mediafile_md5sum = md5()
+                        md5_state = None
+                        chunks_info = []
+                        start_byte = 0
+                        max_uploaded_chunk = 0
+
+                    content_length = int(
+                        mediafile_stream.headers.get("Content-Length", 0)
+                    )
+                    bytes_sent = start_byte
+                    attempt_start = perf_counter()
+                    i = max_uploaded_chunk
+                    async for chunk in mediafile_stream.aiter_bytes(chunk_size):
+                        if not chunk:
+                            break
+                        i += 1
+                        mediafile_md5sum.update(chunk)
+                        if i in existing_chunks:
+                            chunks_info.append(
+                                {"sequence_number": i, "hash": existing_chunks[i]}
+                            )
+                        else:
+                            sign_start = perf_counter()
+                            response = await self.__request(
+                                "POST",
+                                f"{self.elody_storage_api_url}/upload/sign-chunk",
+                                retry_policy=UPLOAD_REQUEST_RETRY_POLICY,
+                                json={**stream_info, "chunk_sequence": i},
+                                headers=self.headers,
+                            )
+                            response.raise_for_status()
+                            upload_url = response.json()["upload_url"]
+                            self.__report_upload_progress(
+                                progress_handler,
+                                "chunk_signed",
+                                sequence_number=i,
+                                duration=perf_counter() - sign_start,
+                            )
+
+                            chunk_upload_start = perf_counter()
+                            response = await self.__request(
+                                "PUT",
+                                upload_url,
+                                retry_policy=UPLOAD_REQUEST_RETRY_POLICY,
+                                content=chunk,
+                                timeout=600,
+                            )
+                            response.raise_for_status()
+                            etag = response.headers["ETag"]
+                            self.__report_upload_progress(
+                                progress_handler,
+                                "chunk_uploaded",
+                                sequence_number=i,
+                                size=len(chunk),
+                                duration=perf_counter() - chunk_upload_start,
+                            )
+
+                            chunks_info.append({"sequence_number": i, "hash": etag})
+                            md5_state = mediafile_md5sum.copy()
+                        bytes_sent += len(chunk)
+                        elapsed = perf_counter() - attempt_start
+                        self.__report_upload_progress(
+                            progress_handler,
+                            "progress",
+                            bytes_sent=bytes_sent,
+                            total_size=content_length,
+                            throughput=(
+                                (bytes_sent - start_byte) / elapsed if elapsed else None
+                            ),
+                        )
+
+                response = await self.__request(
+                    "POST",
+                    f"{self.elody_storage_api_url}/upload/complete-stream",
+                    json={
+                        **stream_info,
+                        "chunks_info": chunks_info,
+                        "file_info": {
+                            "md5sum": mediafile_md5sum.hexdigest(),
+                            "name": filename,
+                        },
+                    },
+                    headers=self.headers,
+                )
+                break
+            except (httpx.HTTPStatusError, httpx.TransportError) as e:
+                exception = e
+                response = getattr(e, "response", None)
+                if self.retry_policy.should_retry(
+                    "PUT",
+                    attempt,
+                    perf_counter() - upload_start,
+                    response.status_code if response is not None else None,
+                ):
+                    sleep_time = self.retry_policy.get_delay(attempt, response)
+                    self.__report_upload_progress(
+                        progress_handler,
+                        "retry",
+                        exception=exception,
+                        delay=sleep_time,
+                        attempt=attempt,
+                        max_attempts=self.retry_policy.max_attempts,
+                    )
+                    await asyncio.sleep(sleep_time)
+                    continue
+            except (Exception, KeyboardInterrupt) as e:
+                exception = e
+            self.__report_upload_progress(
+                progress_handler, "aborted", exception=exception
+            )
+            await self.__request(
+                "POST",
+                f"{self.elody_storage_api_url}/upload/abort-stream",
+                json=stream_info,
+                headers=self.headers,
+            )
+            raise exception
+
+        self.__report_upload_progress(
+            progress_handler, "completed", duration=perf_counter() - upload_start
+        )
+        return self.__handle_response(response, "Failed to upload mediafile")
@@ -0,0 +1,92 @@
+from collections import OrderedDict
+from copy import deepcopy
+from threading import Lock
+from time import monotonic
+
+
+class DocumentCache:
+    def __init__(self, max_size=1000, ttl=None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.documents = OrderedDict()
+        self.aliases = dict()
+        self.lock = Lock()
+        self.statistics = {
+            "hits": 0,
+            "misses": 0,
+            "revalidations": 0,
+            "not_modified": 0,
+            "invalidations": 0,
+        }
+
+    def __get_aliases(self, key, document):
+        collection, identifier = key
+        aliases = {identifier}
+        if isinstance(document, dict):
+            aliases.update(
+                x for x in [document.get("_id"), *document.get("identifiers", [])] if x
+            )
+        return {(collection, alias) for alias in aliases}
+
+    def __is_fresh(self, entry):
+        return self.ttl is not None and monotonic() - entry["stored_at"] < self.ttl
+
+    def __remove(self, key):
+        entry = self.documents.pop(key, None)
+        if not entry:
+            return None
+        for alias in entry["aliases"]:
+            if keys := self.aliases.get(alias):
+                keys.discard(key)
+                if not keys:
+                    del self.aliases[alias]
+        return entry
+
+    def clear(self):
+        with self.lock:
+            self.documents.clear()
+            self.aliases.clear()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.documents.get(key)
+            if not entry:
+                self.statistics["misses"] += 1
+                return None
+            self.documents.move_to_end(key)
+            if self.__is_fresh(entry):
+                self.statistics["hits"] += 1
+                return {**entry, "fresh": True}
+            self.statistics["revalidations"] += 1
+            return {**entry, "fresh": False}
+
+    def get_statistics(self):
+        with self.lock:
+            return {**self.statistics, "size": len(self.documents)}
+
+    def invalidate(self, key):
+        with self.lock:
+            for cached_key in {key, *self.aliases.get(key, set())}:
+                if self.__remove(cached_key):
+                    self.statistics["invalidations"] += 1
+
+    def mark_not_modified(self, key):
+        with self.lock:
+            self.statistics["not_modified"] += 1
+            if entry := self.documents.get(key):
+                entry["stored_at"] = monotonic()
+
+    def put(self, key, etag, document):
+        with self.lock:
+            self.__remove(key)
+            aliases = self.__get_aliases(key, document)
+            self.documents[key] = {
+                "etag": etag,
+                "document": deepcopy(document),
+                "stored_at": monotonic(),
+                "aliases": aliases,
+            }
+            for alias in aliases:
+                self.aliases.setdefault(alias, set()).add(key)
+            while len(self.documents) > self.max_size:
+                self.__remove(next(iter(self.documents)))
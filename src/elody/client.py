@@ -1,12 +1,75 @@
+import gzip
+import json
 import requests
 
+from .cache import DocumentCache
+from .credentials import StaticTokenProvider
 from .exceptions import NonUniqueException, NotFoundException
-from hashlib import md5
-from os import environ
-from requests.exceptions import ConnectionError
-from time import sleep
+from .hashing import MD5_STATE_FORMAT, ResumableMD5
+from .retry import RetryPolicy
+from collections import OrderedDict
+from contextlib import nullcontext
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    ThreadPoolExecutor,
+    as_completed,
+    wait,
+)
+from copy import deepcopy
+from itertools import islice
+from io import SEEK_END
+from mmap import ACCESS_COPY, mmap
+from os import environ, fstat, path, remove, replace
+from requests.adapters import HTTPAdapter
+from requests.exceptions import (
+    ChunkedEncodingError,
+    ConnectionError,
+    HTTPError,
+    Timeout,
+)
+from threading import Lock, local
+from time import perf_counter, sleep
+from types import MappingProxyType
+from weakref import ref
 from urllib.parse import urlparse, parse_qs
 
+ADAPTIVE_CHUNK_SIZE = "adaptive"
+DEFAULT_GZIP_COMPRESSION_LEVEL = 1
+DEFAULT_UPLOAD_CHUNK_SIZE = 50 * (1024**2)
+MIN_UPLOAD_CHUNK_SIZE = 5 * (1024**2)
+MAX_UPLOAD_CHUNK_SIZE = 512 * (1024**2)
+MAX_UPLOAD_CHUNKS = 10000
+UPLOAD_CHUNK_TARGET_SECONDS = 10
+UPLOAD_REQUEST_RETRY_POLICY = RetryPolicy(max_attempts=1)
+
+
+def print_upload_progress(event, data):
+    match event:
+        case "upload_location":
+            print(data["upload_location"])
+        case "progress":
+            bytes_sent, total_size = data["bytes_sent"], data["total_size"]
+            print(
+                f"Progress: {bytes_sent / (1024**2):.2f} MB / {total_size / (1024**2):.2f} MB ({(bytes_sent / total_size) * 100 if total_size > 0 else 0:.2f}%)",
+                end="\r",
+            )
+        case "range_ignored":
+            print("Server ignored Range header. Starting download from 0...")
+        case "retry":
+            print(
+                f"Upload error: {data['exception']}. Retrying in {data['delay']:.1f}s... (Attempt {data['attempt']}/{data['max_attempts']})"
+            )
+        case "interrupted":
+            print(
+                f"Upload interrupted: {data['exception']}. Resume it with {data['checkpoint_path']}"
+            )
+        case "aborted":
+            print(
+                f"Failed to upload mediafile: {data['exception']}. Aborting stream..."
+            )
+        case "completed":
+            print()
+
 
 class Client:
     def __init__(
@@ -17,6 +80,23 @@ class Client:
         proxy=None,
         *,
         elody_storage_api_url=None,
+        pool_connections=10,
+        pool_maxsize=10,
+        pool_block=False,
+        keep_alive=True,
+        upload_chunk_size=DEFAULT_UPLOAD_CHUNK_SIZE,
+        upload_progress_handler=None,
+        document_cache_size=0,
+        document_cache_ttl=None,
+        json_backend="json",
+        compression=None,
+        compression_threshold=64 * 1024,
+        compression_level=None,
+        retry_policy=None,
+        collection_rate_limiter=None,
+        storage_rate_limiter=None,
+        metadata_state_cache_size=10000,
+        credential_provider=None,
     ):
         self.elody_collection_url = elody_collection_url or environ.get(
             "ELODY_COLLECTION_URL", None
@@ -25,22 +105,154 @@ class Client:
             "ELODY_STORAGE_API_URL", None
         )
         self.static_jwt = static_jwt or environ.get("STATIC_JWT", None)
-        self.headers = {"Authorization": f"Bearer {self.static_jwt}"}
-        if extra_headers:
-            self.headers = {**self.headers, **extra_headers}
+        self.credential_provider = credential_provider or StaticTokenProvider(
+            self.static_jwt
+        )
+        self.header_lock = Lock()
+        self.header_sets = None
+        self.header_token = None
+        self.base_headers = dict(extra_headers or {})
         self.proxies = None
         if proxy:
-            self.proxies = {
-                "https": proxy,
-                "http": proxy,
+            self.proxies = MappingProxyType(
+                {
+                    "https": proxy,
+                    "http": proxy,
+                }
+            )
+        self.adapter = HTTPAdapter(
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            pool_block=pool_block,
+        )
+        self.keep_alive = keep_alive
+        self.local = local()
+        self.upload_chunk_size = upload_chunk_size
+        self.upload_throughput = None
+        self.upload_throughput_lock = Lock()
+        self.upload_progress_handler = upload_progress_handler
+        self.json_backend = json_backend
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.collection_rate_limiter = collection_rate_limiter
+        self.storage_rate_limiter = storage_rate_limiter
+        self.compression = compression
+        self.compression_threshold = compression_threshold
+        self.compression_level = compression_level
+        self.__build_header_sets(self.credential_provider.get_token())
+        self.compression_lock = Lock()
+        self.compression_statistics = {
+            "compressed_requests": 0,
+            "request_bytes": 0,
+            "request_wire_bytes": 0,
+            "response_bytes": 0,
+            "response_wire_bytes": 0,
+        }
+        self.document_cache = (
+            DocumentCache(document_cache_size, document_cache_ttl)
+            if document_cache_size
+            else None
+        )
+        self.metadata_state_cache_size = metadata_state_cache_size
+        self.metadata_states = OrderedDict()
+        self.metadata_lock = Lock()
+        self.metadata_statistics = {"fallbacks": 0, "avoided_fallbacks": 0}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    @property
+    def headers(self):
+        return self.__get_headers()
+
+    @headers.setter
+    def headers(self, headers):
+        headers = dict(headers)
+        if headers.get("Authorization") == self.__get_headers().get("Authorization"):
+            headers.pop("Authorization")
+        with self.header_lock:
+            self.base_headers = headers
+            self.__build_header_sets(self.header_token)
+
+    def __build_header_sets(self, token):
+        headers = {"Authorization": f"Bearer {token}", **self.base_headers}
+        json_headers = {**headers, "Content-Type": "application/json"}
+        header_sets = {
+            "default": headers,
+            "json": json_headers,
+            "uri_list": {**headers, "Accept": "text/uri-list"},
+        }
+        if self.compression:
+            header_sets["compressed_json"] = {
+                **json_headers,
+                "Content-Encoding": self.compression,
+            }
+        self.header_sets = {
+            name: MappingProxyType(headers) for name, headers in header_sets.items()
+        }
+        self.header_token = token
+
+    def __get_headers(self, header_set="default"):
+        token = self.credential_provider.get_token()
+        if token != self.header_token:
+            with self.header_lock:
+                if token != self.header_token:
+                    self.__build_header_sets(token)
+        return self.header_sets[header_set]
+
+    def refresh_credentials(self):
+        self.credential_provider.invalidate()
+        return self.__get_headers()
+
+    @property
+    def session(self):
+        if not (session := getattr(self.local, "session", None)):
+            session = self.__create_session()
+            self.local.session = session
+        return session
+
+    def __create_session(self):
+        session = requests.Session()
+        session.mount("https://", self.adapter)
+        session.mount("http://", self.adapter)
+        if not self.keep_alive:
+            session.headers["Connection"] = "close"
+        return session
+
+    def close(self):
+        self.adapter.close()
+
+    def get_pool_metrics(self):
+        metrics = dict()
+        pools = self.adapter.poolmanager.pools
+        for key in pools.keys():
+            pool = pools.get(key)
+            if not pool:
+                continue
+            metrics[f"{pool.scheme}://{pool.host}:{pool.port}"] = {
+                "connections_opened": pool.num_connections,
+                "requests": pool.num_requests,
+                "idle_connections": (
+                    len([conn for conn in list(pool.pool.queue) if conn])
+                    if pool.pool
+                    else 0
+                ),
+                "maxsize": pool.pool.maxsize if pool.pool else 0,
             }
+        return metrics
 
     def __create_mediafile(self, entity_id, mediafile):
         url = f"{self.elody_collection_url}/entities/{entity_id}/mediafiles"
-        headers = {**self.headers, **{"Accept": "text/uri-list"}}
-        response = requests.post(
-            url, json=mediafile, headers=headers, proxies=self.proxies
+        response = self.__request(
+            "POST",
+            url,
+            json=mediafile,
+            headers=self.__get_headers("uri_list"),
+            proxies=self.proxies,
         )
+        self.__invalidate_cached_object("entities", entity_id)
         return self.__handle_response(response, "Failed to create mediafile", "text")
 
     def create_mediafile_with_filename(
@@ -59,7 +271,8 @@ class Client:
         }
         if institution_id:
             data.update({"metadata": [{"key": "institution", "value": institution_id}]})
-        req = requests.post(
+        req = self.__request(
+            "POST",
             f"{self.elody_collection_url}/mediafiles",
             json=data,
             headers=self.headers,
@@ -70,7 +283,8 @@ class Client:
         return req
 
     def create_ticket(self, mediafile_name):
-        req = requests.post(
+        req = self.__request(
+            "POST",
             f"{self.elody_collection_url}/tickets",
             json={"filename": mediafile_name},
             headers=self.headers,
@@ -110,108 +324,659 @@ class Client:
         }
         return self.__create_mediafile(entity_id, mediafile)
 
-    def __handle_response(self, response, error_message, response_type="json"):
+    def __compress(self, body):
+        match self.compression:
+            case "gzip":
+                return gzip.compress(
+                    body,
+                    compresslevel=(
+                        DEFAULT_GZIP_COMPRESSION_LEVEL
+                        if self.compression_level is None
+                        else self.compression_level
+                    ),
+                )
+            case "zstd":
+                try:
+                    from compression import zstd
+                except ModuleNotFoundError:
+                    from backports import zstd
+
+                return zstd.compress(body, level=self.compression_level)
+            case _:
+                raise ValueError(f"Unsupported compression {self.compression}")
+
+    def __count_response_bytes(self, response):
+        try:
+            wire_bytes = response.raw.tell()
+        except AttributeError:
+            return
+        with self.compression_lock:
+            self.compression_statistics["response_bytes"] += len(response.content)
+            self.compression_statistics["response_wire_bytes"] += wire_bytes
+
+    def __decode_json(self, response, json_backend=None):
+        match json_backend or self.json_backend:
+            case "orjson":
+                import orjson
+
+                return orjson.loads(response.content)
+            case _:
+                return response.json()
+
+    def __handle_response(
+        self, response, error_message, response_type="json", json_backend=None
+    ):
         if response.status_code == 409:
             raise NonUniqueException(response.text.strip())
         if response.status_code == 404:
             raise NotFoundException(response.text.strip())
         if response.status_code not in range(200, 300):
             raise Exception(f"{error_message}: {response.text.strip()}")
+        if response_type != "stream":
+            self.__count_response_bytes(response)
         match response_type:
             case "json":
-                return response.json()
+                return self.__decode_json(response, json_backend)
             case "text":
                 return response.text.strip()
+            case "stream":
+                return self.__iter_json_items(response, "results.item")
             case _:
-                return response.json()
+                return self.__decode_json(response, json_backend)
+
+    def __iter_json_items(self, response, prefix):
+        import ijson
+
+        def iter_items():
+            try:
+                response.raw.decode_content = True
+                yield from ijson.items(response.raw, prefix, use_float=True)
+            finally:
+                response.close()
+
+        return iter_items()
 
     def add_entity_mediafiles(self, identifier, payload):
         url = f"{self.elody_collection_url}/entities/{identifier}/mediafiles"
-        response = requests.post(
-            url, json=payload, headers=self.headers, proxies=self.proxies
+        response = self.__request(
+            "POST",
+            url,
+            **self.__prepare_json_body(payload),
+            proxies=self.proxies,
         )
+        self.__invalidate_cached_object("entities", identifier)
         return self.__handle_response(response, "Failed to add mediafiles")
 
     def add_object(self, collection, payload, params=None):
         url = f"{self.elody_collection_url}/{collection}"
-        response = requests.post(
-            url, json=payload, headers=self.headers, params=params, proxies=self.proxies
+        response = self.__request(
+            "POST",
+            url,
+            **self.__prepare_json_body(payload),
+            params=params,
+            proxies=self.proxies,
         )
-        return self.__handle_response(response, "Failed to add object")
+        document = self.__handle_response(response, "Failed to add object")
+        self.__remember_metadata_state(collection, document)
+        return document
 
     def add_object_metadata(self, collection, identifier, payload):
         if collection == "entities":
             url = f"{self.elody_collection_url}/{collection}/{identifier}/metadata"
             payload = payload if isinstance(payload, list) else [payload]
-            response = requests.patch(
-                url, json=payload, headers=self.headers, proxies=self.proxies
-            )
-            if response.status_code == 400 and response.json()["message"].endswith(
+            body = self.__prepare_json_body(payload)
+            method = "POST" if self.__has_metadata(identifier) is False else "PATCH"
+            response = self.__request(method, url, **body, proxies=self.proxies)
+            if method == "POST":
+                self.__count_metadata_statistic("avoided_fallbacks")
+            elif response.status_code == 400 and response.json()["message"].endswith(
                 "has no metadata"
             ):
-                response = requests.post(
-                    url, json=payload, headers=self.headers, proxies=self.proxies
-                )
+                self.__count_metadata_statistic("fallbacks")
+                response = self.__request("POST", url, **body, proxies=self.proxies)
+            self.__invalidate_cached_object(collection, identifier)
+            self.__set_metadata_state(
+                identifier, True if response.status_code in (200, 201) else None
+            )
             return self.__handle_response(response, "Failed to add metadata")
         else:
             url = f"{self.elody_collection_url}/{collection}/{identifier}"
             payload = {"metadata": payload if isinstance(payload, list) else [payload]}
-            response = requests.patch(
-                url, json=payload, headers=self.headers, proxies=self.proxies
+            response = self.__request(
+                "PATCH",
+                url,
+                **self.__prepare_json_body(payload),
+                proxies=self.proxies,
             )
+            self.__invalidate_cached_object(collection, identifier)
             return self.__handle_response(response, "Failed to add metadata")
 
+    def add_objects(
+        self, collection, payloads, params=None, max_workers=10, batch_size=100
+    ):
+        return self.__run_concurrently(
+            lambda payload: self.add_object(collection, payload, params),
+            payloads,
+            max_workers,
+            batch_size,
+        )
+
     def delete_object(self, collection, identifier):
         url = f"{self.elody_collection_url}/{collection}/{identifier}"
-        response = requests.delete(url, headers=self.headers, proxies=self.proxies)
+        response = self.__request(
+            "DELETE", url, headers=self.headers, proxies=self.proxies
+        )
+        self.__invalidate_cached_object(collection, identifier)
+        if collection == "entities":
+            self.__set_metadata_state(identifier, None)
         return self.__handle_response(response, "Failed to delete object", "text")
 
-    def get_all_objects(self, collection):
+    def get_all_objects(self, collection, stream=False, json_backend=None):
         url = f"{self.elody_collection_url}/{collection}"
-        response = requests.get(url, headers=self.headers, proxies=self.proxies)
-        return self.__handle_response(response, "Failed to get objects")
+        response = self.__request(
+            "GET", url, headers=self.headers, proxies=self.proxies, stream=stream
+        )
+        return self.__handle_response(
+            response,
+            "Failed to get objects",
+            "stream" if stream else "json",
+            json_backend,
+        )
 
-    def get_mediafiles_and_check_existence(self, mediafile_ids):
-        mediafile_image_data = []
+    def get_mediafiles_and_check_existence(self, mediafile_ids, max_workers=10):
+        mediafile_image_data, errors = self.get_objects(
+            "mediafiles", mediafile_ids, max_workers=max_workers
+        )
         for mediafile_id in mediafile_ids:
-            response = self.get_object("mediafiles", mediafile_id)
-            mediafile_image_data.append(response)
+            if mediafile_id in errors:
+                raise errors[mediafile_id]
         return mediafile_image_data
 
-    def get_object(self, collection, identifier):
+    def get_object(self, collection, identifier, json_backend=None):
+        document = self.__get_object(collection, identifier, json_backend)
+        self.__remember_metadata_state(collection, document)
+        return document
+
+    def __get_object(self, collection, identifier, json_backend=None):
         url = f"{self.elody_collection_url}/{collection}/{identifier}"
-        response = requests.get(url, headers=self.headers, proxies=self.proxies)
-        return self.__handle_response(response, "Failed to get object")
+        if not self.document_cache:
+            response = self.__request(
+                "GET", url, headers=self.headers, proxies=self.proxies
+            )
+            return self.__handle_response(
+                response, "Failed to get object", json_backend=json_backend
+            )
+
+        cache_key = (collection, identifier)
+        headers = self.headers
+        if cached_object := self.document_cache.get(cache_key):
+            if cached_object["fresh"]:
+                return deepcopy(cached_object["document"])
+            if cached_object["etag"]:
+                headers = {**self.headers, "If-None-Match": cached_object["etag"]}
+        response = self.__request("GET", url, headers=headers, proxies=self.proxies)
+        if cached_object and response.status_code == 304:
+            self.document_cache.mark_not_modified(cache_key)
+            return deepcopy(cached_object["document"])
+        document = self.__handle_response(
+            response, "Failed to get object", json_backend=json_backend
+        )
+        etag = response.headers.get("ETag")
+        if not etag and isinstance(document, dict) and "document_version" in document:
+            etag = f'"{document["document_version"]}"'
+        self.document_cache.put(cache_key, etag, document)
+        return document
+
+    def get_compression_statistics(self):
+        with self.compression_lock:
+            return dict(self.compression_statistics)
+
+    def get_document_cache_statistics(self):
+        if not self.document_cache:
+            return dict()
+        return self.document_cache.get_statistics()
+
+    def get_metadata_statistics(self):
+        with self.metadata_lock:
+            return {
+                **self.metadata_statistics,
+                "known_entities": len(self.metadata_states),
+            }
+
+    def get_objects(
+        self,
+        collection,
+        identifiers,
+        max_workers=10,
+        use_ids_query=False,
+        ids_query_batch_size=100,
+    ):
+        identifiers = list(identifiers)
+        if use_ids_query:
+            return self.__get_objects_with_ids_query(
+                collection, identifiers, max_workers, ids_query_batch_size
+            )
+        results, errors = self.__run_concurrently(
+            lambda identifier: self.get_object(collection, identifier),
+            identifiers,
+            max_workers,
+        )
+        return results, {identifiers[index]: error for index, error in errors.items()}
+
+    def __get_objects_with_ids_query(
+        self, collection, identifiers, max_workers, batch_size
+    ):
+        def get_batch(batch):
+            url = f"{self.elody_collection_url}/{collection}"
+            response = self.__request(
+                "GET",
+                url,
+                params={"ids": ",".join(batch), "limit": len(batch)},
+                headers=self.headers,
+                proxies=self.proxies,
+            )
+            return self.__handle_response(response, "Failed to get objects")
+
+        batches = [
+            identifiers[i : i + batch_size]
+            for i in range(0, len(identifiers), batch_size)
+        ]
+        batch_results, batch_errors = self.__run_concurrently(
+            get_batch, batches, max_workers
+        )
+        objects_by_identifier = dict()
+        for batch_result in batch_results:
+            for object in (batch_result or {}).get("results", []):
+                for identifier in [
+                    object.get("_id"),
+                    object.get("_key"),
+                    *object.get("identifiers", []),
+                ]:
+                    if identifier:
+                        objects_by_identifier.setdefault(identifier, object)
+        results, errors = list(), dict()
+        for index, batch in enumerate(batches):
+            for identifier in batch:
+                if index in batch_errors:
+                    errors[identifier] = batch_errors[index]
+                elif identifier not in objects_by_identifier:
+                    errors[identifier] = NotFoundException(
+                        f"Object with identifier {identifier} not found"
+                    )
+                results.append(objects_by_identifier.get(identifier))
+        return results, errors
+
+    def __invalidate_cached_object(self, collection, identifier):
+        if self.document_cache:
+            self.document_cache.invalidate((collection, identifier))
+
+    def __count_metadata_statistic(self, statistic):
+        with self.metadata_lock:
+            self.metadata_statistics[statistic] += 1
+
+    def __has_metadata(self, identifier):
+        with self.metadata_lock:
+            return self.metadata_states.get(identifier)
+
+    def __remember_metadata_state(self, collection, document):
+        if collection != "entities" or not isinstance(document, dict):
+            return
+        has_metadata = bool(document.get("metadata"))
+        for identifier in {document.get("_id"), *document.get("identifiers", [])}:
+            if identifier:
+                self.__set_metadata_state(identifier, has_metadata)
+
+    def __set_metadata_state(self, identifier, has_metadata):
+        with self.metadata_lock:
+            if has_metadata is None:
+                self.metadata_states.pop(identifier, None)
+                return
+            if not self.metadata_state_cache_size:
+                return
+            self.metadata_states[identifier] = has_metadata
+            self.metadata_states.move_to_end(identifier)
+            while len(self.metadata_states) > self.metadata_state_cache_size:
+                self.metadata_states.popitem(last=False)
+
+    def iter_objects(
+        self,
+        collection,
+        page_size=100,
+        filters=None,
+        prefetch=False,
+        json_backend=None,
+    ):
+        def get_page(skip):
+            url = f"{self.elody_collection_url}/{collection}"
+            response = self.__request(
+                "GET",
+                url,
+                params={**(filters or {}), "skip": skip, "limit": page_size},
+                headers=self.headers,
+                proxies=self.proxies,
+            )
+            return self.__handle_response(
+                response, "Failed to get objects", json_backend=json_backend
+            )
+
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            skip = 0
+            next_page = executor.submit(get_page, skip) if prefetch else None
+            while True:
+                page = next_page.result() if next_page else get_page(skip)
+                results = page.get("results", [])
+                skip += len(results)
+                has_next_page = len(results) >= page_size and skip < page.get(
+                    "count", float("inf")
+                )
+                next_page = (
+                    executor.submit(get_page, skip)
+                    if prefetch and has_next_page
+                    else None
+                )
+                yield from results
+                if not has_next_page:
+                    break
+
+    def patch_objects_metadata(
+        self, collection, payloads, max_workers=10, batch_size=100
+    ):
+        return self.__run_concurrently_by_identifier(
+            lambda identifier, payload: self.add_object_metadata(
+                collection, identifier, payload
+            ),
+            payloads,
+            max_workers,
+            batch_size,
+        )
+
+    def __prepare_json_body(self, payload):
+        body = json.dumps(payload, allow_nan=False).encode("utf-8")
+        if not self.compression or len(body) < self.compression_threshold:
+            return {"data": body, "headers": self.__get_headers("json")}
+        compressed_body = self.__compress(body)
+        with self.compression_lock:
+            self.compression_statistics["compressed_requests"] += 1
+            self.compression_statistics["request_bytes"] += len(body)
+            self.compression_statistics["request_wire_bytes"] += len(compressed_body)
+        return {
+            "data": compressed_body,
+            "headers": self.__get_headers("compressed_json"),
+        }
+
+    def __get_rate_limiter(self, url):
+        if self.elody_storage_api_url and url.startswith(self.elody_storage_api_url):
+            return self.storage_rate_limiter or nullcontext()
+        if self.elody_collection_url and url.startswith(self.elody_collection_url):
+            return self.collection_rate_limiter or nullcontext()
+        return nullcontext()
+
+    def __refresh_authorization(self, kwargs):
+        headers = kwargs.get("headers") or {}
+        if "Authorization" not in headers:
+            return False
+        authorization = self.__get_headers()["Authorization"]
+        if authorization == headers["Authorization"]:
+            authorization = self.refresh_credentials()["Authorization"]
+        if authorization == headers["Authorization"]:
+            return False
+        kwargs["headers"] = {**headers, "Authorization": authorization}
+        return True
+
+    def __request(self, method, url, retry_policy=None, **kwargs):
+        retry_policy = retry_policy or self.retry_policy
+        if kwargs.get("proxies"):
+            kwargs["proxies"] = dict(kwargs["proxies"])
+        request_start = perf_counter()
+        attempt = 0
+        authorization_refreshed = False
+        while True:
+            attempt += 1
+            try:
+                with self.__get_rate_limiter(url):
+                    response = self.session.request(method, url, **kwargs)
+            except (ConnectionError, Timeout):
+                if not retry_policy.should_retry(
+                    method, attempt, perf_counter() - request_start
+                ):
+                    raise
+                sleep(retry_policy.get_delay(attempt))
+                continue
+            if (
+                response.status_code == 401
+                and not authorization_refreshed
+                and self.__refresh_authorization(kwargs)
+            ):
+                authorization_refreshed = True
+                response.close()
+                continue
+            if not retry_policy.should_retry(
+                method, attempt, perf_counter() - request_start, response.status_code
+            ):
+                return response
+            delay = retry_policy.get_delay(attempt, response)
+            response.close()
+            sleep(delay)
+
+    def __run_concurrently(self, function, arguments, max_workers, batch_size=None):
+        arguments = iter(arguments)
+        results = list()
+        errors = dict()
+        with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+            while batch := list(islice(arguments, batch_size)):
+                offset = len(results)
+                results.extend([None] * len(batch))
+                futures = {
+                    executor.submit(function, argument): offset + index
+                    for index, argument in enumerate(batch)
+                }
+                for future in as_completed(futures):
+                    index = futures[future]
+                    try:
+                        results[index] = future.result()
+                    except Exception as error:
+                        errors[index] = error
+        return results, errors
+
+    def __run_concurrently_by_identifier(
+        self, function, payloads, max_workers, batch_size
+    ):
+        identifiers = list(payloads.keys())
+        results, errors = self.__run_concurrently(
+            lambda identifier: function(identifier, payloads[identifier]),
+            identifiers,
+            max_workers,
+            batch_size,
+        )
+        return (
+            {
+                identifiers[index]: result
+                for index, result in enumerate(results)
+                if index not in errors
+            },
+            {identifiers[index]: error for index, error in errors.items()},
+        )
 
     def update_object(self, collection, identifier, payload, overwrite=True):
         url = f"{self.elody_collection_url}/{collection}/{identifier}"
         if overwrite:
-            response = requests.put(
-                url, json=payload, headers=self.headers, proxies=self.proxies
+            response = self.__request(
+                "PUT",
+                url,
+                **self.__prepare_json_body(payload),
+                proxies=self.proxies,
             )
         else:
-            response = requests.patch(
-                url, json=payload, headers=self.headers, proxies=self.proxies
+            response = self.__request(
+                "PATCH",
+                url,
+                **self.__prepare_json_body(payload),
+                proxies=self.proxies,
             )
-        return self.__handle_response(response, "Failed to update object")
+        self.__invalidate_cached_object(collection, identifier)
+        document = self.__handle_response(response, "Failed to update object")
+        self.__remember_metadata_state(collection, document)
+        return document
 
     def update_object_relations(self, collection, identifier, payload):
         url = f"{self.elody_collection_url}/{collection}/{identifier}/relations"
-        response = requests.patch(
-            url, json=payload, headers=self.headers, proxies=self.proxies
+        response = self.__request(
+            "PATCH", url, json=payload, headers=self.headers, proxies=self.proxies
         )
+        self.__invalidate_cached_object(collection, identifier)
         return self.__handle_response(response, "Failed to update object relations")
 
-    def upload_file_from_url(
+    def update_relations_bulk(
+        self, collection, payloads, max_workers=10, batch_size=100
+    ):
+        return self.__run_concurrently_by_identifier(
+            lambda identifier, payload: self.update_object_relations(
+                collection, identifier, payload
+            ),
+            payloads,
+            max_workers,
+            batch_size,
+        )
+
+    def __abort_upload_stream(self, stream_info):
+        self.__request(
+            "POST",
+            f"{self.elody_storage_api_url}/upload/abort-stream",
+            json=stream_info,
+            headers=self.headers,
+            proxies=self.proxies,
+        )
+
+    def __complete_upload_stream(self, stream_info, chunks_info, md5sum, filename):
+        return self.__request(
+            "POST",
+            f"{self.elody_storage_api_url}/upload/complete-stream",
+            json={
+                **stream_info,
+                "chunks_info": chunks_info,
+                "file_info": {
+                    "md5sum": md5sum,
+                    "name": filename,
+                },
+            },
+            headers=self.headers,
+            proxies=self.proxies,
+        )
+
+    def __get_upload_chunk_size(self, chunk_size, total_size):
+        chunk_size = chunk_size or self.upload_chunk_size
+        if chunk_size != ADAPTIVE_CHUNK_SIZE:
+            return chunk_size
+        chunk_size = DEFAULT_UPLOAD_CHUNK_SIZE
+        if self.upload_throughput:
+            chunk_size = int(self.upload_throughput * UPLOAD_CHUNK_TARGET_SECONDS)
+        if total_size:
+            chunk_size = max(chunk_size, -(-total_size // MAX_UPLOAD_CHUNKS))
+        chunk_size = min(max(chunk_size, MIN_UPLOAD_CHUNK_SIZE), MAX_UPLOAD_CHUNK_SIZE)
+        if total_size:
+            chunk_size = min(chunk_size, total_size)
+        return chunk_size
+
+    def __get_upload_checkpoint(self, checkpoint_path, source):
+        if not checkpoint_path:
+            return None
+        try:
+            with open(checkpoint_path) as file:
+                checkpoint = json.load(file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        if checkpoint.get("source") != source:
+            return None
+        return checkpoint
+
+    def __get_uploaded_chunks(self, stream_info):
+        response = self.__request(
+            "GET",
+            f"{self.elody_storage_api_url}/upload/stream-status",
+            retry_policy=UPLOAD_REQUEST_RETRY_POLICY,
+            params=stream_info,
+            headers=self.headers,
+            proxies=self.proxies,
+        )
+        response.raise_for_status()
+        return {
+            chunk["sequence_number"]: chunk["hash"]
+            for chunk in response.json().get("uploaded_chunks", [])
+        }
+
+    def __get_file_source(self, file, filename, file_start, file_size):
+        try:
+            file_stat = fstat(file.fileno())
+        except (AttributeError, OSError):
+            return f"{filename}:{file_size}"
+        file_path = getattr(file, "name", None)
+        if isinstance(file_path, str):
+            file_path = path.realpath(file_path)
+        else:
+            file_path = f"{file_stat.st_dev}:{file_stat.st_ino}"
+        return f"{file_path}:{file_start}:{file_stat.st_size}:{file_stat.st_mtime_ns}"
+
+    def __get_resume_chunk(self, uploaded_chunks, md5_states):
+        resume_chunk = uploaded_chunk = min(md5_states)
+        for sequence_number in sorted(md5_states):
+            while (
+                uploaded_chunk < sequence_number
+                and uploaded_chunk + 1 in uploaded_chunks
+            ):
+                uploaded_chunk += 1
+            if uploaded_chunk < sequence_number:
+                break
+            resume_chunk = sequence_number
+        return resume_chunk
+
+    def __get_upload_md5_states(self, checkpoint):
+        md5_states = {0: ResumableMD5()}
+        if checkpoint.get("md5_state_format") != MD5_STATE_FORMAT:
+            return md5_states
+        for sequence_number, state in checkpoint.get("md5_states", {}).items():
+            try:
+                md5_states[int(sequence_number)] = ResumableMD5(state)
+            except ValueError:
+                pass
+        return md5_states
+
+    def __hash_chunks(self, chunks, resume_chunk, md5_states):
+        mediafile_md5sum = md5_states[resume_chunk].copy()
+        for i, chunk in enumerate(chunks, start=resume_chunk + 1):
+            if not chunk:
+                break
+            mediafile_md5sum.update(chunk)
+            md5_states[i] = mediafile_md5sum.copy()
+            yield i, chunk
+
+    def __iter_exact_chunks(self, chunks, chunk_size):
+        buffer = bytearray()
+        for chunk in chunks:
+            if not buffer and len(chunk) == chunk_size:
+                yield chunk
+                continue
+            buffer += chunk
+            while len(buffer) >= chunk_size:
+                yield bytes(buffer[:chunk_size])
+                del buffer[:chunk_size]
+        if buffer:
+            yield bytes(buffer)
+
+    def __init_upload_stream(
         self,
         entity_id,
         filename,
-        file_url,
-        identifiers=None,
-        upload_location_replace_map=None,
-        mediafile_object=None,
-        user_email=None,
+        identifiers,
+        upload_location_replace_map,
+        mediafile_object,
+        user_email,
+        checkpoint_path,
+        source,
+        chunk_size,
+        progress_handler,
     ):
+        if checkpoint := self.__get_upload_checkpoint(checkpoint_path, source):
+            return checkpoint
         if not identifiers:
             identifiers = list()
         if not upload_location_replace_map:
@@ -224,147 +989,507 @@ class Client:
         upload_location = upload_location.replace('"', "")
         if user_email and "&user_email" not in upload_location:
             upload_location = f"{upload_location}&user_email={user_email}"
-        print(upload_location)
+        self.__report_upload_progress(
+            progress_handler, "upload_location", upload_location=upload_location
+        )
 
         parsed_upload_location = urlparse(upload_location)
         mediafile_id = parse_qs(parsed_upload_location.query).get("id", [None])[0]
         if not mediafile_id:
             raise ValueError(f"Could not extract mediafile_id from {upload_location}")
 
-        response = requests.post(
+        response = self.__request(
+            "POST",
             f"{self.elody_storage_api_url}/upload/init-stream",
             params={"mediafile_id": mediafile_id},
             headers=self.headers,
             proxies=self.proxies,
         )
         response.raise_for_status()
-        stream_info = response.json()
+        checkpoint = {
+            "source": source,
+            "stream_info": response.json(),
+            "chunk_size": chunk_size,
+            "md5_states": dict(),
+        }
+        self.__save_upload_checkpoint(checkpoint_path, checkpoint)
+        return checkpoint
+
+    def __report_upload_progress(self, progress_handler, event, **data):
+        if progress_handler:
+            progress_handler(event, data)
+
+    def __report_uploaded_bytes(self, progress_handler, upload_progress, size):
+        with upload_progress["lock"]:
+            upload_progress["bytes_sent"] += size
+            bytes_sent = upload_progress["bytes_sent"]
+            elapsed = perf_counter() - upload_progress["start"]
+            self.__report_upload_progress(
+                progress_handler,
+                "progress",
+                bytes_sent=bytes_sent,
+                total_size=upload_progress["total_size"],
+                throughput=(
+                    (bytes_sent - upload_progress["start_byte"]) / elapsed
+                    if elapsed
+                    else None
+                ),
+            )
 
-        mediafile_md5sum = md5()
-        md5_state = None
-        chunks_info = []
-        retry_count = 0
+    def __remove_upload_checkpoint(self, checkpoint_path):
+        if checkpoint_path and path.exists(checkpoint_path):
+            remove(checkpoint_path)
+
+    def __run_upload_stream(
+        self, checkpoint, checkpoint_path, filename, upload_chunks, progress_handler
+    ):
+        stream_info = checkpoint["stream_info"]
+        upload_start = perf_counter()
+        attempt = 0
         while True:
-            exception = None
+            attempt += 1
             try:
-                if md5_state is not None:
-                    mediafile_md5sum = md5_state.copy()
-
-                response = requests.get(
-                    f"{self.elody_storage_api_url}/upload/stream-status",
-                    params=stream_info,
-                    headers=self.headers,
-                    proxies=self.proxies,
+                existing_chunks = self.__get_uploaded_chunks(stream_info)
+                chunks_info, md5sum = upload_chunks(existing_chunks)
+                response = self.__complete_upload_stream(
+                    stream_info, chunks_info, md5sum, filename
                 )
-                response.raise_for_status()
-                existing_chunks = {
-                    chunk["sequence_number"]: chunk["hash"]
-                    for chunk in response.json().get("uploaded_chunks", [])
-                }
-
-                chunk_size = 50 * (1024**2)
-                max_uploaded_chunk = (
-                    max(existing_chunks.keys()) if existing_chunks else 0
+                break
+            except (ChunkedEncodingError, ConnectionError, HTTPError, Timeout) as e:
+                exception = e
+                status_code = e.response.status_code if e.response is not None else None
+                resumable = (
+                    status_code is None
+                    or status_code in self.retry_policy.retry_status_codes
                 )
-                start_byte = max_uploaded_chunk * chunk_size
-
-                download_headers = {}
-                if start_byte > 0 and existing_chunks:
-                    download_headers["Range"] = f"bytes={start_byte}-"
-
-                with requests.get(
-                    file_url,
-                    headers=download_headers,
-                    proxies=self.proxies,
-                    stream=True,
-                    timeout=None,
-                ) as mediafile_stream:
-                    mediafile_stream.raise_for_status()
-                    if mediafile_stream.status_code == 200 and start_byte > 0:
-                        print(
-                            "Server ignored Range header. Starting download from 0..."
-                        )
-                        mediafile_md5sum = md5()
-                        md5_state = None
-                        chunks_info = []
-                        start_byte = 0
-                        max_uploaded_chunk = 0
-
-                    content_length = int(
-                        mediafile_stream.headers.get("Content-Length", 0)
+                if resumable and self.retry_policy.should_retry(
+                    "PUT", attempt, perf_counter() - upload_start, status_code
+                ):
+                    sleep_time = self.retry_policy.get_delay(attempt, e.response)
+                    self.__report_upload_progress(
+                        progress_handler,
+                        "retry",
+                        exception=exception,
+                        delay=sleep_time,
+                        attempt=attempt,
+                        max_attempts=self.retry_policy.max_attempts,
                     )
-                    bytes_sent = start_byte
-                    for i, chunk in enumerate(
-                        mediafile_stream.iter_content(chunk_size=chunk_size),
-                        start=max_uploaded_chunk + 1,
-                    ):
-                        if not chunk:
-                            break
-                        mediafile_md5sum.update(chunk)
-                        bytes_sent += len(chunk)
-                        print(
-                            f"Progress: {bytes_sent / (1024**2):.2f} MB / {content_length / (1024**2):.2f} MB ({(bytes_sent / content_length) * 100 if content_length > 0 else 0:.2f}%)",
-                            end="\r",
-                        )
-                        if i in existing_chunks:
-                            chunks_info.append(
-                                {"sequence_number": i, "hash": existing_chunks[i]}
-                            )
-                            continue
-
-                        response = requests.post(
-                            f"{self.elody_storage_api_url}/upload/sign-chunk",
-                            json={**stream_info, "chunk_sequence": i},
-                            headers=self.headers,
-                            proxies=self.proxies,
-                        )
-                        response.raise_for_status()
-                        upload_url = response.json()["upload_url"]
-
-                        response = requests.put(upload_url, data=chunk, timeout=600)
-                        response.raise_for_status()
-                        etag = response.headers["ETag"]
-
-                        chunks_info.append({"sequence_number": i, "hash": etag})
-                        md5_state = mediafile_md5sum.copy()
-
-                response = requests.post(
-                    f"{self.elody_storage_api_url}/upload/complete-stream",
-                    json={
-                        **stream_info,
-                        "chunks_info": chunks_info,
-                        "file_info": {
-                            "md5sum": mediafile_md5sum.hexdigest(),
-                            "name": filename,
-                        },
-                    },
-                    headers=self.headers,
-                    proxies=self.proxies,
-                )
-            except ConnectionError as e:
+                    sleep(sleep_time)
+                    continue
+            except KeyboardInterrupt as e:
                 exception = e
-            except (Exception, KeyboardInterrupt) as e:
-                retry_count = 4
+                resumable = True
+            except Exception as e:
                 exception = e
-            if not exception:
-                break
-
-            retry_count += 1
-            if retry_count >= 4:
-                print(f"Failed to upload mediafile: {exception}. Aborting stream...")
-                requests.post(
-                    f"{self.elody_storage_api_url}/upload/abort-stream",
-                    json=stream_info,
-                    headers=self.headers,
-                    proxies=self.proxies,
+                resumable = False
+            if resumable and checkpoint_path:
+                self.__report_upload_progress(
+                    progress_handler,
+                    "interrupted",
+                    exception=exception,
+                    checkpoint_path=checkpoint_path,
                 )
                 raise exception
-
-            sleep_time = 10**retry_count
-            print(
-                f"Upload error: {exception}. Retrying in {sleep_time}s... (Attempt {retry_count}/4)"
+            self.__report_upload_progress(
+                progress_handler, "aborted", exception=exception
             )
-            sleep(sleep_time)
+            self.__abort_upload_stream(stream_info)
+            self.__remove_upload_checkpoint(checkpoint_path)
+            raise exception
 
-        print()
+        self.__report_upload_progress(
+            progress_handler, "completed", duration=perf_counter() - upload_start
+        )
+        self.__remove_upload_checkpoint(checkpoint_path)
         return self.__handle_response(response, "Failed to upload mediafile")
+
+    def __save_upload_checkpoint(self, checkpoint_path, checkpoint):
+        if not checkpoint_path:
+            return
+        temporary_path = f"{checkpoint_path}.tmp"
+        with open(temporary_path, "w") as file:
+            json.dump(checkpoint, file)
+        replace(temporary_path, checkpoint_path)
+
+    def __save_uploaded_chunk(
+        self, checkpoint_path, checkpoint, md5_states, uploaded_chunks, chunk_info
+    ):
+        uploaded_chunks.add(chunk_info["sequence_number"])
+        resume_chunk = self.__get_resume_chunk(uploaded_chunks, md5_states)
+        for sequence_number in [x for x in md5_states if x < resume_chunk]:
+            del md5_states[sequence_number]
+        if not checkpoint_path:
+            return
+        checkpoint["md5_state_format"] = MD5_STATE_FORMAT
+        checkpoint["md5_states"] = {
+            str(sequence_number): state
+            for sequence_number, md5_state in md5_states.items()
+            if sequence_number == resume_chunk or sequence_number in uploaded_chunks
+            if (state := md5_state.get_state())
+        }
+        self.__save_upload_checkpoint(checkpoint_path, checkpoint)
+
+    def __upload_chunk(
+        self,
+        stream_info,
+        sequence_number,
+        chunk,
+        existing_chunks,
+        upload_progress,
+        progress_handler,
+    ):
+        if sequence_number in existing_chunks:
+            self.__report_uploaded_bytes(progress_handler, upload_progress, len(chunk))
+            return {
+                "sequence_number": sequence_number,
+                "hash": existing_chunks[sequence_number],
+            }
+        sign_start = perf_counter()
+        response = self.__request(
+            "POST",
+            f"{self.elody_storage_api_url}/upload/sign-chunk",
+            retry_policy=UPLOAD_REQUEST_RETRY_POLICY,
+            json={**stream_info, "chunk_sequence": sequence_number},
+            headers=self.headers,
+            proxies=self.proxies,
+        )
+        response.raise_for_status()
+        upload_url = response.json()["upload_url"]
+        self.__report_upload_progress(
+            progress_handler,
+            "chunk_signed",
+            sequence_number=sequence_number,
+            duration=perf_counter() - sign_start,
+        )
+
+        upload_start = perf_counter()
+        response = self.__request(
+            "PUT",
+            upload_url,
+            retry_policy=UPLOAD_REQUEST_RETRY_POLICY,
+            data=chunk,
+            timeout=600,
+        )
+        response.raise_for_status()
+        upload_duration = perf_counter() - upload_start
+        self.__update_upload_throughput(len(chunk), upload_duration)
+        self.__report_upload_progress(
+            progress_handler,
+            "chunk_uploaded",
+            sequence_number=sequence_number,
+            size=len(chunk),
+            duration=upload_duration,
+        )
+        self.__report_uploaded_bytes(progress_handler, upload_progress, len(chunk))
+        return {"sequence_number": sequence_number, "hash": response.headers["ETag"]}
+
+    def __upload_chunks(
+        self,
+        stream_info,
+        chunks,
+        existing_chunks,
+        resume_chunk,
+        start_byte,
+        total_size,
+        max_parallel_chunks,
+        on_chunk_uploaded,
+        progress_handler,
+    ):
+        upload_progress = {
+            "bytes_sent": start_byte,
+            "lock": Lock(),
+            "start": perf_counter(),
+            "start_byte": start_byte,
+            "total_size": total_size,
+        }
+        chunks_info = [
+            {"sequence_number": i, "hash": existing_chunks[i]}
+            for i in range(1, resume_chunk + 1)
+        ]
+
+        def add_chunk_info(chunk_info):
+            chunks_info.append(chunk_info)
+            if chunk_info["sequence_number"] not in existing_chunks:
+                on_chunk_uploaded(chunk_info)
+
+        if max_parallel_chunks <= 1:
+            for sequence_number, chunk in chunks:
+                add_chunk_info(
+                    self.__upload_chunk(
+                        stream_info,
+                        sequence_number,
+                        chunk,
+                        existing_chunks,
+                        upload_progress,
+                        progress_handler,
+                    )
+                )
+            return chunks_info
+        in_flight = set()
+        executor = ThreadPoolExecutor(max_workers=max_parallel_chunks)
+        try:
+            for sequence_number, chunk in chunks:
+                in_flight.add(
+                    executor.submit(
+                        self.__upload_chunk,
+                        stream_info,
+                        sequence_number,
+                        chunk,
+                        existing_chunks,
+                        upload_progress,
+                        progress_handler,
+                    )
+                )
+                if len(in_flight) >= max_parallel_chunks:
+                    done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        add_chunk_info(future.result())
+            for future in as_completed(in_flight):
+                add_chunk_info(future.result())
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+        return sorted(chunks_info, key=lambda chunk: chunk["sequence_number"])
+
+    def __update_upload_throughput(self, size, duration):
+        if duration <= 0:
+            return
+        throughput = size / duration
+        with self.upload_throughput_lock:
+            if self.upload_throughput:
+                throughput = 0.8 * self.upload_throughput + 0.2 * throughput
+            self.upload_throughput = throughput
+
+    def upload_file_from_fileobj(
+        self,
+        entity_id,
+        filename,
+        file,
+        identifiers=None,
+        upload_location_replace_map=None,
+        mediafile_object=None,
+        user_email=None,
+        *,
+        max_parallel_chunks=1,
+        checkpoint_path=None,
+        chunk_size=None,
+        progress_handler=None,
+    ):
+        progress_handler = progress_handler or self.upload_progress_handler
+        seekable = file.seekable()
+        file_start = file.tell() if seekable else 0
+        file_size = file.seek(0, SEEK_END) - file_start if seekable else None
+        file_offset = 0
+        mapped_file = None
+        views = list()
+        if file_size:
+            try:
+                mapped_file = mmap(file.fileno(), 0, access=ACCESS_COPY)
+            except (OSError, ValueError):
+                mapped_file = None
+        checkpoint = self.__init_upload_stream(
+            entity_id,
+            filename,
+            identifiers,
+            upload_location_replace_map,
+            mediafile_object,
+            user_email,
+            checkpoint_path,
+            self.__get_file_source(file, filename, file_start, file_size),
+            self.__get_upload_chunk_size(chunk_size, file_size),
+            progress_handler,
+        )
+        md5_states = self.__get_upload_md5_states(checkpoint)
+
+        def read_chunks(start_byte, chunk_size):
+            nonlocal file_offset
+            if mapped_file is not None:
+                view = memoryview(mapped_file)
+                views.append(ref(view))
+                for offset in range(
+                    file_start + start_byte, file_start + file_size, chunk_size
+                ):
+                    chunk = view[
+                        offset : min(offset + chunk_size, file_start + file_size)
+                    ]
+                    views.append(ref(chunk))
+                    yield chunk
+                return
+            if seekable:
+                file.seek(file_start + start_byte)
+            elif start_byte != file_offset:
+                raise ValueError(
+                    f"Cannot resume uploading {filename} from a non-seekable file"
+                )
+            while chunk := file.read(chunk_size):
+                file_offset += len(chunk)
+                yield chunk
+
+        def upload_chunks(existing_chunks):
+            uploaded_chunks = set(existing_chunks)
+            resume_chunk = self.__get_resume_chunk(uploaded_chunks, md5_states)
+            start_byte = resume_chunk * checkpoint["chunk_size"]
+            chunks = self.__hash_chunks(
+                read_chunks(start_byte, checkpoint["chunk_size"]),
+                resume_chunk,
+                md5_states,
+            )
+            chunks_info = self.__upload_chunks(
+                checkpoint["stream_info"],
+                chunks,
+                existing_chunks,
+                resume_chunk,
+                start_byte,
+                file_size or 0,
+                max_parallel_chunks,
+                lambda chunk_info: self.__save_uploaded_chunk(
+                    checkpoint_path,
+                    checkpoint,
+                    md5_states,
+                    uploaded_chunks,
+                    chunk_info,
+                ),
+                progress_handler,
+            )
+            return chunks_info, md5_states[len(chunks_info)].hexdigest()
+
+        try:
+            return self.__run_upload_stream(
+                checkpoint, checkpoint_path, filename, upload_chunks, progress_handler
+            )
+        finally:
+            for view in views:
+                if (view := view()) is not None:
+                    view.release()
+            if mapped_file is not None:
+                mapped_file.close()
+
+    def upload_file_from_path(
+        self,
+        entity_id,
+        filename,
+        file_path,
+        identifiers=None,
+        upload_location_replace_map=None,
+        mediafile_object=None,
+        user_email=None,
+        *,
+        max_parallel_chunks=1,
+        checkpoint_path=None,
+        chunk_size=None,
+        progress_handler=None,
+    ):
+        with open(file_path, "rb") as file:
+            return self.upload_file_from_fileobj(
+                entity_id,
+                filename,
+                file,
+                identifiers,
+                upload_location_replace_map,
+                mediafile_object,
+                user_email,
+                max_parallel_chunks=max_parallel_chunks,
+                checkpoint_path=checkpoint_path,
+                chunk_size=chunk_size,
+                progress_handler=progress_handler,
+            )
+
+    def upload_file_from_url(
+        self,
+        entity_id,
+        filename,
+        file_url,
+        identifiers=None,
+        upload_location_replace_map=None,
+        mediafile_object=None,
+        user_email=None,
+        *,
+        max_parallel_chunks=1,
+        checkpoint_path=None,
+        chunk_size=None,
+        progress_handler=None,
+    ):
+        progress_handler = progress_handler or self.upload_progress_handler
+        checkpoint = self.__init_upload_stream(
+            entity_id,
+            filename,
+            identifiers,
+            upload_location_replace_map,
+            mediafile_object,
+            user_email,
+            checkpoint_path,
+            file_url,
+            None,
+            progress_handler,
+        )
+        md5_states = self.__get_upload_md5_states(checkpoint)
+
+        def upload_chunks(existing_chunks):
+            uploaded_chunks = set(existing_chunks)
+            resume_chunk = self.__get_resume_chunk(uploaded_chunks, md5_states)
+            start_byte = resume_chunk * (checkpoint["chunk_size"] or 0)
+
+            download_headers = {}
+            if start_byte > 0:
+                download_headers["Range"] = f"bytes={start_byte}-"
+
+            with self.__request(
+                "GET",
+                file_url,
+                retry_policy=UPLOAD_REQUEST_RETRY_POLICY,
+                headers=download_headers,
+                proxies=self.proxies,
+                stream=True,
+                timeout=None,
+            ) as mediafile_stream:
+                if mediafile_stream.status_code == 416 and start_byte > 0:
+                    chunks_info = [
+                        {"sequence_number": i, "hash": existing_chunks[i]}
+                        for i in range(1, resume_chunk + 1)
+                    ]
+                    return chunks_info, md5_states[resume_chunk].hexdigest()
+                mediafile_stream.raise_for_status()
+                if mediafile_stream.status_code == 200 and start_byte > 0:
+                    self.__report_upload_progress(progress_handler, "range_ignored")
+                    start_byte = 0
+                    resume_chunk = 0
+                    md5_states.clear()
+                    md5_states[0] = ResumableMD5()
+
+                content_length = int(mediafile_stream.headers.get("Content-Length", 0))
+                if not checkpoint["chunk_size"]:
+                    checkpoint["chunk_size"] = self.__get_upload_chunk_size(
+                        chunk_size, content_length
+                    )
+                    self.__save_upload_checkpoint(checkpoint_path, checkpoint)
+                chunks = self.__hash_chunks(
+                    self.__iter_exact_chunks(
+                        mediafile_stream.iter_content(
+                            chunk_size=checkpoint["chunk_size"]
+                        ),
+                        checkpoint["chunk_size"],
+                    ),
+                    resume_chunk,
+                    md5_states,
+                )
+                chunks_info = self.__upload_chunks(
+                    checkpoint["stream_info"],
+                    chunks,
+                    existing_chunks,
+                    resume_chunk,
+                    start_byte,
+                    start_byte + content_length if content_length else 0,
+                    max_parallel_chunks,
+                    lambda chunk_info: self.__save_uploaded_chunk(
+                        checkpoint_path,
+                        checkpoint,
+                        md5_states,
+                        uploaded_chunks,
+                        chunk_info,
+                    ),
+                    progress_handler,
+                )
+            return chunks_info, md5_states[len(chunks_info)].hexdigest()
+
+        return self.__run_upload_stream(
+            checkpoint, checkpoint_path, filename, upload_chunks, progress_handler
+        )
@@ -0,0 +1,62 @@
+import json
+
+from base64 import urlsafe_b64decode
+from threading import Lock
+from time import monotonic, time
+
+
+class StaticTokenProvider:
+    def __init__(self, token):
+        self.token = token
+
+    def get_token(self):
+        return self.token
+
+    def invalidate(self):
+        pass
+
+
+class RefreshingTokenProvider:
+    def __init__(self, fetch_token, refresh_margin=60):
+        self.fetch_token = fetch_token
+        self.refresh_margin = refresh_margin
+        self.token = None
+        self.expires_at = None
+        self.lock = Lock()
+
+    def __get_jwt_expires_in(self, token):
+        try:
+            payload = token.split(".")[1]
+            claims = json.loads(urlsafe_b64decode(payload + "=" * (-len(payload) % 4)))
+            return claims["exp"] - time()
+        except (IndexError, KeyError, TypeError, ValueError):
+            return None
+
+    def __needs_refresh(self):
+        if self.token is None:
+            return True
+        if self.expires_at is None:
+            return False
+        return monotonic() >= self.expires_at - self.refresh_margin
+
+    def get_token(self):
+        if not self.__needs_refresh():
+            return self.token
+        with self.lock:
+            if self.__needs_refresh():
+                self.refresh()
+            return self.token
+
+    def invalidate(self):
+        with self.lock:
+            self.token = None
+
+    def refresh(self):
+        token = self.fetch_token()
+        expires_in = None
+        if isinstance(token, tuple):
+            token, expires_in = token
+        if expires_in is None:
+            expires_in = self.__get_jwt_expires_in(token)
+        self.expires_at = monotonic() + expires_in if expires_in is not None else None
+        self.token = token
@@ -1,7 +1,11 @@
 import csv
 import re
 
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
 from io import StringIO
+from itertools import chain, islice
 from elody.error_codes import ErrorCode, get_error_code, get_write
 from elody.exceptions import (
     ColumnNotFoundException,
@@ -9,10 +13,20 @@ from elody.exceptions import (
     InvalidObjectException,
     InvalidValueException,
 )
-from elody.validator import validate_json
+from elody.validator import validate_json, validate_json_batch
 from elody.schemas import entity_schema, mediafile_schema
 from dateutil import parser
 
+DATETIME_CACHE_SIZE = 10000
+IGNORED_COLUMN_HANDLER = (None, True, None, None)
+ISO_DATETIME_PATTERN = re.compile(
+    r"\d{4}-\d{2}-\d{2}([t ]\d{2}:\d{2}(:\d{2}(\.(\d{3}|\d{6}))?)?)?", re.IGNORECASE
+)
+NUMBER_PATTERN = re.compile(r"\s*[+-]?(\d[\d_]*(\.\d*)?|\.\d+)\s*")
+RELATION_FIELD_PATTERN = re.compile("(has|is)([A-Z][a-z]+)+")
+SHARD_SIZE = 10000
+SNIFF_SIZE = 64 * 1024
+
 
 class CSVParser:
     top_level_fields = ["type", "filename", "file_identifier"]
@@ -24,7 +38,11 @@ class CSVParser:
         "mediafiles": mediafile_schema,
     }
 
-    def __init__(self, csvstring=None, csvfile=None):
+    def __init__(
+        self, csvstring=None, csvfile=None, dialect=None, sniff_size=SNIFF_SIZE
+    ):
+        self.dialect = dialect
+        self.sniff_size = sniff_size
         if csvstring:
             self.csvstring = csvstring
             self.reader = self.__get_reader_from_csv(self.__csv_string_to_file_object())
@@ -45,7 +63,7 @@ class CSVParser:
         }
 
     def _is_relation_field(self, field):
-        if re.fullmatch("(has|is)([A-Z][a-z]+)+", field):
+        if RELATION_FIELD_PATTERN.fullmatch(field):
             return True
         return False
 
@@ -53,9 +71,13 @@ class CSVParser:
         return StringIO(self.csvstring)
 
     def __get_reader_from_csv(self, csv_file):
-        csv_dialect = csv.Sniffer().sniff(csv_file.read())
-        csv_file.seek(0)
-        return csv.DictReader(csv_file, dialect=csv_dialect)
+        if self.dialect:
+            return csv.DictReader(csv_file, dialect=self.dialect)
+        sample = csv_file.read(self.sniff_size)
+        if sample and not sample.endswith("\n"):
+            sample += csv_file.readline()
+        csv_dialect = csv.Sniffer().sniff(sample)
+        return csv.DictReader(chain(StringIO(sample), csv_file), dialect=csv_dialect)
 
 
 class CSVSingleObject(CSVParser):
@@ -124,7 +146,7 @@ class CSVSingleObject(CSVParser):
 class CSVMultiObject(CSVParser):
     def __init__(
         self,
-        csvstring,
+        csvstring=None,
         index_mapping=None,
         object_field_mapping=None,
         required_metadata_values=None,
@@ -132,8 +154,17 @@ class CSVMultiObject(CSVParser):
         include_indexed_field=False,
         top_level_fields_mapping=None,
         external_file_sources=None,
+        report_all_validation_errors=False,
+        csvfile=None,
+        stream=False,
+        dialect=None,
+        sniff_size=SNIFF_SIZE,
+        datetime_formats=None,
+        datetime_sample_size=None,
+        max_workers=None,
+        shard_size=SHARD_SIZE,
     ):
-        super().__init__(csvstring)
+        super().__init__(csvstring, csvfile, dialect, sniff_size)
         self.index_mapping = index_mapping if index_mapping else dict()
         self.object_field_mapping = (
             object_field_mapping if object_field_mapping else dict()
@@ -154,8 +185,20 @@ class CSVMultiObject(CSVParser):
             external_file_sources if external_file_sources else []
         )
         self.line_numbers = []
-        self.__fill_objects_from_csv()
-        self.__rename_top_level_fields()
+        self.column_plan = None
+        self.column_types = dict()
+        self.datetime_cache = dict()
+        self.datetime_formats = datetime_formats if datetime_formats else list()
+        self.datetime_sample_size = datetime_sample_size
+        self.max_workers = max_workers
+        self.shard_size = shard_size
+        self.pending_file_identifiers = None
+        self.report_all_validation_errors = report_all_validation_errors
+        if not stream:
+            if max_workers and max_workers > 1:
+                self.__fill_objects_from_csv_in_parallel()
+            else:
+                self.__fill_objects_from_csv()
 
     def get_entities(self):
         return self.objects.get("entities", list())
@@ -167,7 +210,7 @@ class CSVMultiObject(CSVParser):
         return self.line_numbers
 
     def get_line_number(self, entity_identifier=None, mediafile_identifier=None):
-        for line_number, line_info in enumerate(self.line_numbers, start=1):
+        for line_info in self.line_numbers:
             if (
                 entity_identifier
                 and line_info.get("entity_identifier") != entity_identifier
@@ -178,7 +221,7 @@ class CSVMultiObject(CSVParser):
                 and line_info.get("mediafile_identifier") != mediafile_identifier
             ):
                 continue
-            return line_number
+            return line_info["line"]
         return None
 
     def set_error(self, type, errors):
@@ -190,14 +233,6 @@ class CSVMultiObject(CSVParser):
     def get_mediafiles(self):
         return self.objects.get("mediafiles", list())
 
-    def __determine_language(self, row):
-        if "language" in row:
-            return row.get("language")
-        elif "lang" in row:
-            return row.get("lang")
-        else:
-            return "en"
-
     def __field_allowed(self, target_object_type, key, value):
         for object_type, fields in self.object_field_mapping.items():
             for _ in [x for x in fields if x == key]:
@@ -209,139 +244,338 @@ class CSVMultiObject(CSVParser):
         return bool(value)
 
     def is_datetime(self, value):
-        try:
-            int(value)
-            return False
-        except (ValueError, TypeError):
-            try:
-                parser.parse(value)
-                return True
-            except (ValueError, TypeError):
-                return False
+        return self.get_datetime(value) is not None
 
     def parse_datetime(self, value):
+        if (parsed_datetime := self.get_datetime(value)) is not None:
+            return parsed_datetime
         return parser.parse(value)
 
+    def get_datetime(self, value):
+        if not isinstance(value, str):
+            return None
+        if value in self.datetime_cache:
+            return self.datetime_cache[value]
+        parsed_datetime = self.__parse_datetime(value)
+        if len(self.datetime_cache) >= DATETIME_CACHE_SIZE:
+            self.datetime_cache.clear()
+        self.datetime_cache[value] = parsed_datetime
+        return parsed_datetime
+
+    def __get_column_datetime(self, column, value):
+        if self.column_types.get(column) == "text" or not self.is_datetime(value):
+            return None
+        return self.parse_datetime(value)
+
+    def __infer_column_types(self, rows):
+        column_types = dict()
+        if not rows:
+            return column_types
+        if not self.column_plan:
+            self.column_plan = self.__compile_column_plan(
+                [key for key in rows[0].keys() if key is not None]
+            )
+        metadata_columns = {
+            column
+            for _, _, _, column_handlers in self.column_plan["indexes"]
+            for column, (handler, _, _, _) in column_handlers.items()
+            if handler == "metadata"
+        }
+        for row in rows:
+            for column in metadata_columns:
+                value = row.get(column)
+                if not value or not isinstance(value, str):
+                    continue
+                if column_types.get(column) == "datetime":
+                    continue
+                column_types[column] = (
+                    "datetime" if self.is_datetime(value.lower()) else "text"
+                )
+        return column_types
+
+    def __get_rows(self):
+        if not self.datetime_sample_size:
+            return self.reader
+        sample_rows = list(islice(self.reader, self.datetime_sample_size))
+        self.column_types = self.__infer_column_types(sample_rows)
+        return chain(sample_rows, self.reader)
+
+    def __parse_datetime(self, value):
+        if NUMBER_PATTERN.fullmatch(value):
+            return None
+        if ISO_DATETIME_PATTERN.fullmatch(value):
+            try:
+                return datetime.fromisoformat(value)
+            except ValueError:
+                pass
+        for datetime_format in self.datetime_formats:
+            try:
+                return datetime.strptime(value, datetime_format)
+            except ValueError:
+                pass
+        try:
+            return parser.parse(value)
+        except (ValueError, TypeError):
+            return None
+
     def __fill_objects_from_csv(self):
         indexed_dict = dict()
         external_mediafiles_ids = []
-        for row_number, row in enumerate(self.reader, start=1):
-            normalized_mapping = {
-                key.lstrip("?"): value for key, value in self.index_mapping.items()
-            }
-            entity_identifier_column = normalized_mapping.get("entities")
-            mediafile_identifier_column = normalized_mapping.get("mediafiles")
-            entity_identifier = (
-                row.get(entity_identifier_column) if entity_identifier_column else None
+        for row_number, row in enumerate(self.__get_rows(), start=1):
+            self.__fill_objects_from_row(
+                indexed_dict, external_mediafiles_ids, row_number, row
             )
-            mediafile_identifier = (
-                row.get(mediafile_identifier_column)
-                if mediafile_identifier_column
-                else None
+        self.objects = self.__get_objects_from_indexed_dict(
+            indexed_dict, external_mediafiles_ids
+        )
+
+    def __fill_objects_from_csv_in_parallel(self):
+        options = {
+            "index_mapping": self.index_mapping,
+            "object_field_mapping": self.object_field_mapping,
+            "metadata_field_mapping": self.metadata_field_mapping,
+            "include_indexed_field": self.include_indexed_field,
+            "external_file_sources": self.external_file_sources,
+            "datetime_formats": self.datetime_formats,
+        }
+        indexed_dict = dict()
+        external_mediafiles_ids = []
+        rows = self.__get_rows()
+        row_number = 1
+        futures = deque()
+        with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+            while shard := list(islice(rows, self.shard_size)):
+                futures.append(
+                    executor.submit(
+                        _fill_objects_from_shard,
+                        type(self),
+                        options,
+                        self.column_types,
+                        row_number,
+                        shard,
+                    )
+                )
+                row_number += len(shard)
+                if len(futures) >= 2 * self.max_workers:
+                    self.__merge_shard(
+                        indexed_dict,
+                        external_mediafiles_ids,
+                        futures.popleft().result(),
+                    )
+            while futures:
+                self.__merge_shard(
+                    indexed_dict, external_mediafiles_ids, futures.popleft().result()
+                )
+        self.objects = self.__get_objects_from_indexed_dict(
+            indexed_dict, external_mediafiles_ids
+        )
+
+    def _fill_objects_from_shard(self, first_row_number, rows):
+        indexed_dict = dict()
+        external_mediafiles_ids = []
+        self.pending_file_identifiers = list()
+        for row_number, row in enumerate(rows, start=first_row_number):
+            self.__fill_objects_from_row(
+                indexed_dict, external_mediafiles_ids, row_number, row
             )
-            self.line_numbers.append(
-                {
-                    "line": row_number,
-                    "entity_identifier": entity_identifier,
-                    "mediafile_identifier": mediafile_identifier,
-                }
+        return {
+            "indexed_dict": indexed_dict,
+            "external_mediafiles_ids": external_mediafiles_ids,
+            "errors": self.errors,
+            "line_numbers": self.line_numbers,
+            "pending_file_identifiers": self.pending_file_identifiers,
+        }
+
+    def __merge_shard(self, indexed_dict, external_mediafiles_ids, shard):
+        for id, value in shard["pending_file_identifiers"]:
+            if id in indexed_dict.get("entities", dict()):
+                indexed_dict["entities"][id]["file_identifier"] = value
+        for type, objects in shard["indexed_dict"].items():
+            merged_objects = indexed_dict.setdefault(type, dict())
+            for id, object in objects.items():
+                if id not in merged_objects:
+                    merged_objects[id] = object
+                    continue
+                merged_object = merged_objects[id]
+                for key, value in object.items():
+                    if key in ["metadata", "relations"]:
+                        merged_object.setdefault(key, list()).extend(value)
+                    elif key == "identifiers":
+                        identifiers = merged_object.setdefault(key, list())
+                        identifiers.extend(x for x in value if x not in identifiers)
+                    else:
+                        merged_object[key] = value
+        for entry in shard["external_mediafiles_ids"]:
+            if not any(
+                matching_id in id
+                for matching_id in entry
+                for id in external_mediafiles_ids
+            ):
+                external_mediafiles_ids.append(entry)
+        for error_type, errors in shard["errors"].items():
+            self.errors.setdefault(error_type, list()).extend(errors)
+        self.line_numbers.extend(shard["line_numbers"])
+
+    def __compile_column_plan(self, columns):
+        normalized_mapping = {
+            key.lstrip("?"): value for key, value in self.index_mapping.items()
+        }
+        mandatory_columns = [
+            v for k, v in self.index_mapping.items() if not k.startswith("?")
+        ]
+        missing_columns = [x for x in mandatory_columns if x not in columns]
+        if missing_columns:
+            raise ColumnNotFoundException(f"{', '.join(missing_columns)}")
+        indexes = list()
+        for type, identifying_column in self.index_mapping.items():
+            is_type_optional = type.startswith("?")
+            type = type.lstrip("?")
+            column_handlers = {
+                column: self.__compile_column_handler(type, identifying_column, column)
+                for column in columns
+            }
+            indexes.append(
+                (type, identifying_column, is_type_optional, column_handlers)
             )
-            mandatory_columns = [
-                v for k, v in self.index_mapping.items() if not k.startswith("?")
-            ]
-            missing_columns = [x for x in mandatory_columns if x not in row.keys()]
-            if missing_columns:
-                raise ColumnNotFoundException(f"{', '.join(missing_columns)}")
-            lang = self.__determine_language(row)
-            previous_id = None
-            for type, identifying_column in self.index_mapping.items():
-                is_type_optional = False
-                if type.startswith("?"):
-                    is_type_optional = True
-                    type = type.lstrip("?")
-                if not row.get(identifying_column) and is_type_optional:
+        return {
+            "entity_identifier_column": normalized_mapping.get("entities"),
+            "mediafile_identifier_column": normalized_mapping.get("mediafiles"),
+            "language_column": next(
+                (column for column in ["language", "lang"] if column in columns), None
+            ),
+            "indexes": indexes,
+        }
+
+    def __compile_column_handler(self, type, identifying_column, column):
+        lower = column != identifying_column
+        if not self.__field_allowed(type, column, True):
+            return (None, lower, None, None)
+        if self._is_relation_field(column):
+            return ("relation", lower, None, None)
+        if column in self.identifier_fields:
+            return ("identifier", lower, None, None)
+        if column in self.top_level_fields:
+            return ("top_level", lower, None, None)
+        if column in self.index_mapping.values() and not self.include_indexed_field:
+            return (None, lower, None, None)
+        metadata_info = self.metadata_field_mapping.get(column, {})
+        if metadata_info.get("target") != type and metadata_info:
+            return (None, lower, None, None)
+        return (
+            "metadata",
+            lower,
+            metadata_info.get("map_to", column),
+            metadata_info.get("value_options"),
+        )
+
+    def __fill_objects_from_row(
+        self, indexed_dict, external_mediafiles_ids, row_number, row
+    ):
+        if not self.column_plan:
+            self.column_plan = self.__compile_column_plan(
+                [key for key in row.keys() if key is not None]
+            )
+        column_plan = self.column_plan
+        entity_identifier_column = column_plan["entity_identifier_column"]
+        mediafile_identifier_column = column_plan["mediafile_identifier_column"]
+        entity_identifier = (
+            row.get(entity_identifier_column) if entity_identifier_column else None
+        )
+        mediafile_identifier = (
+            row.get(mediafile_identifier_column)
+            if mediafile_identifier_column
+            else None
+        )
+        self.line_numbers.append(
+            {
+                "line": row_number,
+                "entity_identifier": entity_identifier,
+                "mediafile_identifier": mediafile_identifier,
+            }
+        )
+        language_column = column_plan["language_column"]
+        lang = row.get(language_column) if language_column else "en"
+        previous_id = None
+        for type, identifying_column, is_type_optional, column_handlers in column_plan[
+            "indexes"
+        ]:
+            if not row.get(identifying_column) and is_type_optional:
+                continue
+            id = row[identifying_column]
+            if type not in indexed_dict:
+                indexed_dict[type] = dict()
+            if id not in indexed_dict[type]:
+                indexed_dict[type][id] = dict()
+            object = indexed_dict[type][id]
+            object["matching_id"] = id
+            if previous_id:
+                object["matching_id"] = previous_id
+            previous_id = id
+            file_source = None
+            for key, value in row.items():
+                if not value:
                     continue
-                id = row[identifying_column]
-                if type not in indexed_dict:
-                    indexed_dict[type] = dict()
-                if id not in indexed_dict[type]:
-                    indexed_dict[type][id] = dict()
-                indexed_dict[type][id]["matching_id"] = id
-                if previous_id:
-                    indexed_dict[type][id]["matching_id"] = previous_id
-                previous_id = id
-                file_source = None
-                for key, value in row.items():
-                    if not value:
+                if not key or isinstance(value, list):
+                    if len(value) == 1 and value[0] == "":
                         continue
-                    if not key or isinstance(value, list):
-                        if len(value) == 1 and value[0] == "":
-                            continue
+                    if "invalid_value" not in self.get_errors():
+                        self.set_error("invalid_value", list())
+                    message = f'{get_error_code(ErrorCode.INVALID_VALUE, get_write())} | value:{value} | line_number:{row_number} - The value "{value}" is invalid, most likely caused by exceeding allowed columns.'
+                    self.get_errors()["invalid_value"].append(message)
+                handler, lower, metadata_key, options = column_handlers.get(
+                    key, IGNORED_COLUMN_HANDLER
+                )
+                original_value = value
+                if lower:
+                    value = value.lower()
+                if key == "file_source":
+                    file_source = value
+                if (
+                    key == "file_identifier"
+                    and file_source in self.external_file_sources
+                ):
+                    matching_id = object["matching_id"]
+                    if not any(matching_id in id for id in external_mediafiles_ids):
+                        external_mediafiles_ids.append({matching_id: file_source})
+                    if "entities" not in indexed_dict:
+                        indexed_dict["entities"] = dict()
+                    if id in indexed_dict["entities"]:
+                        indexed_dict["entities"][id]["file_identifier"] = value
+                    elif self.pending_file_identifiers is not None:
+                        self.pending_file_identifiers.append((id, value))
+                if handler == "relation":
+                    object.setdefault("relations", list())
+                    object["relations"].append(self._get_relation_object(key, value))
+                elif handler == "identifier":
+                    object.setdefault("identifiers", list())
+                    if value not in object["identifiers"]:
+                        object["identifiers"].append(value)
+                elif handler == "top_level":
+                    object[key] = original_value
+                elif handler == "metadata":
+                    object.setdefault("metadata", list())
+                    if (
+                        parsed_datetime := self.__get_column_datetime(key, value)
+                    ) is not None:
+                        original_value = parsed_datetime
+                    if options and value not in options:
                         if "invalid_value" not in self.get_errors():
                             self.set_error("invalid_value", list())
-                        message = f'{get_error_code(ErrorCode.INVALID_VALUE, get_write())} | value:{value} | line_number:{row_number} - The value "{value}" is invalid, most likely caused by exceeding allowed columns.'
+                        message = f'{get_error_code(ErrorCode.INVALID_VALUE, get_write())} | value:{value} | options:{options}| line_number:{row_number} - The value "{value}" is invalid, these are the valid values: {options}'
                         self.get_errors()["invalid_value"].append(message)
-                    original_value = value
-                    if key != identifying_column:
-                        value = value.lower()
-                    if key == "file_source":
-                        file_source = value
-                    if (
-                        key == "file_identifier"
-                        and file_source in self.external_file_sources
-                    ):
-                        matching_id = indexed_dict[type][id]["matching_id"]
-                        if not any(matching_id in id for id in external_mediafiles_ids):
-                            external_mediafiles_ids.append({matching_id: file_source})
-                        if "entities" not in indexed_dict:
-                            indexed_dict["entities"] = dict()
-                        if id in indexed_dict["entities"]:
-                            indexed_dict["entities"][id]["file_identifier"] = value
-                    if self._is_relation_field(key) and self.__field_allowed(
-                        type, key, value
-                    ):
-                        indexed_dict[type][id].setdefault("relations", list())
-                        indexed_dict[type][id]["relations"].append(
-                            self._get_relation_object(key, value)
-                        )
-                    elif key in self.identifier_fields and self.__field_allowed(
-                        type, key, value
-                    ):
-                        indexed_dict[type][id].setdefault("identifiers", list())
-                        if value not in indexed_dict[type][id]["identifiers"]:
-                            indexed_dict[type][id]["identifiers"].append(value)
-                    elif key in self.top_level_fields and self.__field_allowed(
-                        type, key, value
-                    ):
-                        indexed_dict[type][id][key] = original_value
-                    elif (
-                        key not in self.index_mapping.values()
-                        or self.include_indexed_field
-                    ) and self.__field_allowed(type, key, value):
-                        metadata_info = self.metadata_field_mapping.get(key, {})
-                        if metadata_info.get("target") == type or not metadata_info:
-                            metadata_key = metadata_info.get("map_to", key)
-                            indexed_dict[type][id].setdefault("metadata", list())
-                            options = metadata_info.get("value_options")
-                            if self.is_datetime(value):
-                                original_value = self.parse_datetime(value)
-                            if options and value not in options:
-                                if "invalid_value" not in self.get_errors():
-                                    self.set_error("invalid_value", list())
-                                message = f'{get_error_code(ErrorCode.INVALID_VALUE, get_write())} | value:{value} | options:{options}| line_number:{row_number} - The value "{value}" is invalid, these are the valid values: {options}'
-                                self.get_errors()["invalid_value"].append(message)
-
-                            indexed_dict[type][id]["metadata"].append(
-                                self._get_metadata_object(
-                                    metadata_key, original_value, lang
-                                )
-                            )
+
+                    object["metadata"].append(
+                        self._get_metadata_object(metadata_key, original_value, lang)
+                    )
+
+    def __get_objects_from_indexed_dict(self, indexed_dict, external_mediafiles_ids):
+        objects = dict()
         self.__validate_indexed_dict(indexed_dict)
         self.__add_required_fields(indexed_dict)
-        for object_type, objects in indexed_dict.items():
-            self.objects[object_type] = list(objects.values())
+        for object_type, indexed_objects in indexed_dict.items():
+            objects[object_type] = list(indexed_objects.values())
         if external_mediafiles_ids:
-            for mediafile in self.objects["mediafiles"]:
+            for mediafile in objects.get("mediafiles", list()):
                 matching_id = mediafile["matching_id"]
                 for entry in external_mediafiles_ids:
                     if matching_id in entry:
@@ -349,6 +583,37 @@ class CSVMultiObject(CSVParser):
                         dynamic_key = f"is_{file_source}_mediafile"
                         mediafile[dynamic_key] = True
                         break
+        self.__rename_top_level_fields(objects)
+        return objects
+
+    def iter_objects(self, flush_column=None):
+        indexed_dict = dict()
+        external_mediafiles_ids = []
+        flush_value = None
+        for row_number, row in enumerate(self.__get_rows(), start=1):
+            if flush_column and indexed_dict and row.get(flush_column) != flush_value:
+                yield from self.__iter_objects_from_indexed_dict(
+                    indexed_dict, external_mediafiles_ids
+                )
+                indexed_dict = dict()
+                external_mediafiles_ids = []
+                self.line_numbers = []
+            if flush_column:
+                flush_value = row.get(flush_column)
+            self.__fill_objects_from_row(
+                indexed_dict, external_mediafiles_ids, row_number, row
+            )
+        yield from self.__iter_objects_from_indexed_dict(
+            indexed_dict, external_mediafiles_ids
+        )
+
+    def __iter_objects_from_indexed_dict(self, indexed_dict, external_mediafiles_ids):
+        objects = self.__get_objects_from_indexed_dict(
+            indexed_dict, external_mediafiles_ids
+        )
+        for object_type, typed_objects in objects.items():
+            for object in typed_objects:
+                yield object_type, object
 
     def __add_required_fields(self, indexed_dict):
         if not self.required_metadata_values:
@@ -373,31 +638,43 @@ class CSVMultiObject(CSVParser):
 
     def __validate_indexed_dict(self, indexed_dict):
         for object_type, objects in indexed_dict.items():
-            error_ids = list()
-            for object_id, object in objects.items():
-                if validation_error := validate_json(
-                    object, self.schema_mapping.get(object_type, entity_schema)
-                ):
-                    error_ids.append(object_id)
-                    if object_type not in self.errors:
-                        self.errors[object_type] = list()
-                    self.errors[object_type].append(
-                        f"{object_type} with index {object_id} doesn't have a valid format. {validation_error}"
+            validation_errors = validate_json_batch(
+                objects,
+                self.schema_mapping.get(object_type, entity_schema),
+                self.report_all_validation_errors,
+            )
+            for object_id, validation_error in validation_errors.items():
+                if self.report_all_validation_errors:
+                    validation_error = "; ".join(
+                        f"{error['path']}: {error['message']}"
+                        for error in validation_error
                     )
-            for error_id in error_ids:
-                del objects[error_id]
-
-    def __rename_top_level_fields(self):
+                if object_type not in self.errors:
+                    self.errors[object_type] = list()
+                self.errors[object_type].append(
+                    f"{object_type} with index {object_id} doesn't have a valid format. {validation_error}"
+                )
+                del objects[object_id]
+
+    def __rename_top_level_fields(self, objects):
         def rename_fields(items, mapping):
             for item in items:
                 for old_key, new_key in mapping.items():
                     if old_key in item:
                         item[new_key] = item.pop(old_key)
 
-        mediafiles = self.get_mediafiles()
-        entities = self.get_entities()
+        mediafiles = objects.get("mediafiles", list())
+        entities = objects.get("entities", list())
         mediafiles_mapping = self.get_top_level_fields_mapping("mediafiles")
         entities_mapping = self.get_top_level_fields_mapping("entities")
 
         rename_fields(mediafiles, mediafiles_mapping)
         rename_fields(entities, entities_mapping)
+
+
+def _fill_objects_from_shard(
+    csv_multi_object_class, options, column_types, first_row_number, rows
+):
+    csv_multi_object = csv_multi_object_class(**options, stream=True)
+    csv_multi_object.column_types = column_types
+    return csv_multi_object._fill_objects_from_shard(first_row_number, rows)
@@ -0,0 +1,89 @@
+import ctypes
+
+from hashlib import md5
+
+MD5_CTX_SIZE = 92
+MD5_CTX_BUFFER_SIZE = 256
+
+
+def _load_md5_functions():
+    try:
+        import _hashlib
+
+        libcrypto = ctypes.CDLL(_hashlib.__file__)
+        functions = (libcrypto.MD5_Init, libcrypto.MD5_Update, libcrypto.MD5_Final)
+        openssl_version_num = libcrypto.OpenSSL_version_num
+    except (AttributeError, ImportError, OSError):
+        return None, None
+    md5_init, md5_update, md5_final = functions
+    md5_init.argtypes = [ctypes.c_void_p]
+    md5_update.argtypes = [ctypes.c_void_p, ctypes.c_void_p, ctypes.c_size_t]
+    md5_final.argtypes = [ctypes.c_void_p, ctypes.c_void_p]
+    openssl_version_num.restype = ctypes.c_ulong
+    padding = b"\xa5" * (MD5_CTX_BUFFER_SIZE - MD5_CTX_SIZE)
+    context = ctypes.create_string_buffer(
+        bytes(MD5_CTX_SIZE) + padding, MD5_CTX_BUFFER_SIZE
+    )
+    digest = ctypes.create_string_buffer(16)
+    md5_init(context)
+    md5_update(context, b"elody", 5)
+    md5_final(digest, context)
+    if digest.raw != md5(b"elody").digest() or context.raw[MD5_CTX_SIZE:] != padding:
+        return None, None
+    return functions, f"openssl-{openssl_version_num():x}-md5-ctx-{MD5_CTX_SIZE}"
+
+
+MD5_FUNCTIONS, MD5_STATE_FORMAT = _load_md5_functions()
+
+
+class ResumableMD5:
+    def __init__(self, state=None):
+        self.hash = None
+        self.context = None
+        if MD5_FUNCTIONS is None:
+            if state is not None:
+                raise ValueError("MD5 states can not be restored on this platform")
+            self.hash = md5()
+            return
+        if state is None:
+            self.context = ctypes.create_string_buffer(MD5_CTX_BUFFER_SIZE)
+            MD5_FUNCTIONS[0](self.context)
+            return
+        state = bytes.fromhex(state)
+        if len(state) != MD5_CTX_SIZE:
+            raise ValueError(f"Invalid MD5 state of {len(state)} bytes")
+        self.context = ctypes.create_string_buffer(state, MD5_CTX_BUFFER_SIZE)
+
+    def copy(self):
+        copy = ResumableMD5.__new__(ResumableMD5)
+        copy.hash = self.hash.copy() if self.hash else None
+        copy.context = (
+            ctypes.create_string_buffer(self.context.raw, MD5_CTX_BUFFER_SIZE)
+            if self.context
+            else None
+        )
+        return copy
+
+    def get_state(self):
+        return self.context.raw[:MD5_CTX_SIZE].hex() if self.context else None
+
+    def hexdigest(self):
+        if self.hash:
+            return self.hash.hexdigest()
+        context = ctypes.create_string_buffer(self.context.raw, MD5_CTX_BUFFER_SIZE)
+        digest = ctypes.create_string_buffer(16)
+        MD5_FUNCTIONS[2](digest, context)
+        return digest.raw.hex()
+
+    def update(self, data):
+        if self.hash:
+            self.hash.update(data)
+        elif isinstance(data, bytes):
+            MD5_FUNCTIONS[1](self.context, data, len(data))
+        elif len(data):
+            data = memoryview(data).cast("B")
+            if data.readonly:
+                data = data.tobytes()
+            else:
+                data = (ctypes.c_char * len(data)).from_buffer(data)
+            MD5_FUNCTIONS[1](self.context, data, len(data))
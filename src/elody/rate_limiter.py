@@ -0,0 +1,43 @@
+from threading import BoundedSemaphore, Lock
+from time import monotonic, sleep
+
+
+class RateLimiter:
+    def __init__(self, rate=None, burst=None, max_in_flight=None):
+        self.rate = rate
+        self.burst = burst or max(1, rate or 1)
+        self.tokens = self.burst
+        self.updated_at = monotonic()
+        self.lock = Lock()
+        self.semaphore = BoundedSemaphore(max_in_flight) if max_in_flight else None
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.release()
+
+    def __wait_for_token(self):
+        while True:
+            with self.lock:
+                now = monotonic()
+                self.tokens = min(
+                    self.burst, self.tokens + (now - self.updated_at) * self.rate
+                )
+                self.updated_at = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait_time = (1 - self.tokens) / self.rate
+            sleep(wait_time)
+
+    def acquire(self):
+        if self.semaphore:
+            self.semaphore.acquire()
+        if self.rate:
+            self.__wait_for_token()
+
+    def release(self):
+        if self.semaphore:
+            self.semaphore.release()
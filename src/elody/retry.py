@@ -0,0 +1,60 @@
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from random import uniform
+
+
+class RetryPolicy:
+    def __init__(
+        self,
+        max_attempts=4,
+        backoff_factor=0.5,
+        max_backoff=60,
+        max_elapsed_time=300,
+        jitter=True,
+        retry_status_codes=(429, 502, 503, 504),
+        retry_methods=("DELETE", "GET", "HEAD", "OPTIONS", "PUT"),
+        respect_retry_after=True,
+    ):
+        self.max_attempts = max_attempts
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+        self.max_elapsed_time = max_elapsed_time
+        self.jitter = jitter
+        self.retry_status_codes = frozenset(retry_status_codes)
+        self.retry_methods = frozenset(method.upper() for method in retry_methods)
+        self.respect_retry_after = respect_retry_after
+
+    def __get_retry_after(self, response):
+        retry_after = (
+            response.headers.get("Retry-After") if response is not None else None
+        )
+        if not retry_after:
+            return None
+        try:
+            return max(0, float(retry_after))
+        except ValueError:
+            pass
+        try:
+            retry_at = parsedate_to_datetime(retry_after)
+        except (TypeError, ValueError):
+            return None
+        if retry_at.tzinfo is None:
+            retry_at = retry_at.replace(tzinfo=timezone.utc)
+        return max(0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+    def get_delay(self, attempt, response=None):
+        if self.respect_retry_after:
+            retry_after = self.__get_retry_after(response)
+            if retry_after is not None:
+                return min(retry_after, self.max_backoff)
+        delay = min(self.max_backoff, self.backoff_factor * 2 ** (attempt - 1))
+        return uniform(0, delay) if self.jitter else delay
+
+    def should_retry(self, method, attempt, elapsed_time, status_code=None):
+        if attempt >= self.max_attempts:
+            return False
+        if self.max_elapsed_time is not None and elapsed_time >= self.max_elapsed_time:
+            return False
+        if method.upper() not in self.retry_methods:
+            return False
+        return status_code is None or status_code in self.retry_status_codes
@@ -1,10 +1,63 @@
-from jsonschema.exceptions import ValidationError
-from jsonschema.validators import validate
+from collections.abc import Mapping
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from jsonschema.exceptions import best_match
+from jsonschema.validators import validator_for
+from threading import Lock
 
+MAX_CACHED_VALIDATORS = 128
 
-def validate_json(json, schema):
-    try:
-        validate(instance=json, schema=schema)
-    except ValidationError as ve:
-        return ve.message
-    return None
+_validators = dict()
+_validators_lock = Lock()
+
+
+def get_validator(schema):
+    if (cached := _validators.get(id(schema))) and cached[0] is schema:
+        return cached[1]
+    validator_class = validator_for(schema)
+    validator_class.check_schema(schema)
+    validator = validator_class(schema, format_checker=validator_class.FORMAT_CHECKER)
+    with _validators_lock:
+        if len(_validators) >= MAX_CACHED_VALIDATORS:
+            del _validators[next(iter(_validators))]
+        _validators[id(schema)] = (schema, validator)
+    return validator
+
+
+def get_validation_errors(json, schema):
+    errors = get_validator(schema).iter_errors(json)
+    return [
+        {"path": error.json_path, "message": error.message}
+        for error in sorted(errors, key=lambda error: error.json_path)
+    ]
+
+
+def validate_json(json, schema, all_errors=False):
+    if all_errors:
+        return get_validation_errors(json, schema) or None
+    error = best_match(get_validator(schema).iter_errors(json))
+    return error.message if error else None
+
+
+def validate_json_batch(
+    jsons, schema, all_errors=False, max_workers=None, chunk_size=1000
+):
+    items = list(jsons.items() if isinstance(jsons, Mapping) else enumerate(jsons))
+    if not max_workers or max_workers < 2 or len(items) <= chunk_size:
+        return _validate_items(schema, items, all_errors)
+    chunks = [items[i : i + chunk_size] for i in range(0, len(items), chunk_size)]
+    errors = dict()
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        for chunk_errors in executor.map(
+            _validate_items, repeat(schema), chunks, repeat(all_errors)
+        ):
+            errors.update(chunk_errors)
+    return errors
+
+
+def _validate_items(schema, items, all_errors):
+    errors = dict()
+    for key, json in items:
+        if error := validate_json(json, schema, all_errors):
+            errors[key] = error
+    return errors
@@ -0,0 +1,91 @@
+import argparse
+
+from elody.csv import CSVMultiObject
+from time import perf_counter
+
+COLUMNS = [
+    "external_id",
+    "type",
+    "file_source",
+    "file_identifier",
+    "asset_copyright_color",
+    "mediafile_copyright_color",
+    "photographer",
+    "isPartOf",
+    "identifier",
+    *[f"description_{index}" for index in range(20)],
+]
+
+
+def generate_csv(rows):
+    lines = [",".join(COLUMNS)]
+    for row in range(rows):
+        lines.append(
+            ",".join(
+                [
+                    f"id:{row // 2}",
+                    "asset",
+                    "file",
+                    f"file_{row}.jpg",
+                    "green",
+                    "red",
+                    f"photographer {row % 100}",
+                    f"collection_{row % 10}",
+                    f"identifier_{row}",
+                    *[f"description {row} {index}" for index in range(20)],
+                ]
+            )
+        )
+    return "\n".join(lines) + "\n"
+
+
+def parse_csv(csv, max_workers=None, datetime_sample_size=None):
+    return CSVMultiObject(
+        csv,
+        index_mapping={"entities": "external_id", "?mediafiles": "file_identifier"},
+        object_field_mapping={
+            "mediafiles": ["file_identifier", "mediafile_copyright_color"],
+            "entities": [
+                "type",
+                "asset_copyright_color",
+                "external_id",
+                "isPartOf",
+                *[f"description_{index}" for index in range(10)],
+            ],
+        },
+        metadata_field_mapping={
+            "asset_copyright_color": {
+                "target": "entities",
+                "map_to": "copyright_color",
+                "value_options": ["green", "orange", "red"],
+            },
+            "mediafile_copyright_color": {
+                "target": "mediafiles",
+                "map_to": "copyright_color",
+                "value_options": ["green", "orange", "red"],
+            },
+        },
+        include_indexed_field=True,
+        max_workers=max_workers,
+        datetime_sample_size=datetime_sample_size,
+    )
+
+
+def main():
+    argument_parser = argparse.ArgumentParser()
+    argument_parser.add_argument("--rows", type=int, default=20000)
+    argument_parser.add_argument("--repeat", type=int, default=3)
+    argument_parser.add_argument("--max-workers", type=int, default=None)
+    argument_parser.add_argument("--datetime-sample-size", type=int, default=None)
+    arguments = argument_parser.parse_args()
+    csv = generate_csv(arguments.rows)
+    durations = list()
+    for _ in range(arguments.repeat):
+        start = perf_counter()
+        parse_csv(csv, arguments.max_workers, arguments.datetime_sample_size)
+        durations.append(perf_counter() - start)
+    print(f"{arguments.rows / min(durations):,.0f} rows/s")
+
+
+if __name__ == "__main__":
+    main()
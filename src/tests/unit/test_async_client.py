@@ -0,0 +1,401 @@
+import asyncio
+import httpx
+import json
+import pytest
+
+from elody.async_client import AsyncClient
+from elody.client import DEFAULT_UPLOAD_CHUNK_SIZE
+from elody.exceptions import NonUniqueException, NotFoundException
+from elody.retry import RetryPolicy
+from functools import partial
+from hashlib import md5
+from unittest.mock import patch
+
+
+class FakeElodyApi:
+    def __init__(self, documents=(), file_content=b""):
+        self.documents = {document["_id"]: dict(document) for document in documents}
+        self.file_content = file_content
+        self.requests = list()
+        self.responses = dict()
+        self.put_errors = list()
+        self.uploaded_chunks = dict()
+        self.completed = None
+        self.aborted = False
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def handle(self, request):
+        self.requests.append(request)
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(0)
+            if responses := self.responses.get((request.method, request.url.path)):
+                return responses.pop(0)
+            return self.__handle(request)
+        finally:
+            self.in_flight -= 1
+
+    def get_paths(self, method=None):
+        return [
+            request.url.path
+            for request in self.requests
+            if method is None or request.method == method
+        ]
+
+    def __handle(self, request):
+        payload = None
+        if request.headers.get("Content-Type") == "application/json":
+            payload = json.loads(request.content)
+        match request.method, request.url.path.strip("/").split("/"):
+            case "GET", ["file"]:
+                return self.__get_file(request)
+            case "POST", ["entities", entity_id, "mediafiles"]:
+                return httpx.Response(
+                    201, text=f'"http://storage/upload?id={entity_id}-file"'
+                )
+            case "POST", ["upload", "init-stream"]:
+                return httpx.Response(
+                    200, json={"upload_id": request.url.params["mediafile_id"]}
+                )
+            case "GET", ["upload", "stream-status"]:
+                return httpx.Response(
+                    200,
+                    json={
+                        "uploaded_chunks": [
+                            {"sequence_number": sequence_number, "hash": etag}
+                            for sequence_number, (etag, _) in sorted(
+                                self.uploaded_chunks.get(
+                                    request.url.params["upload_id"], {}
+                                ).items()
+                            )
+                        ]
+                    },
+                )
+            case "POST", ["upload", "sign-chunk"]:
+                return httpx.Response(
+                    200,
+                    json={
+                        "upload_url": f"http://s3/chunk/{payload['chunk_sequence']}"
+                        f"?upload_id={payload['upload_id']}"
+                    },
+                )
+            case "PUT", ["chunk", sequence_number]:
+                if self.put_errors:
+                    return httpx.Response(self.put_errors.pop(0))
+                etag = md5(request.content).hexdigest()
+                self.uploaded_chunks.setdefault(request.url.params["upload_id"], {})[
+                    int(sequence_number)
+                ] = (etag, request.content)
+                return httpx.Response(200, headers={"ETag": etag})
+            case "POST", ["upload", "complete-stream"]:
+                self.completed = payload
+                return httpx.Response(201, json={"_id": payload["upload_id"]})
+            case "POST", ["upload", "abort-stream"]:
+                self.aborted = True
+                return httpx.Response(200)
+            case "GET", [_]:
+                return httpx.Response(
+                    200,
+                    json={
+                        "count": len(self.documents),
+                        "results": list(self.documents.values()),
+                    },
+                )
+            case "GET", [_, identifier]:
+                if identifier not in self.documents:
+                    return httpx.Response(404, text="not found")
+                return httpx.Response(200, json=self.documents[identifier])
+            case "POST", [_]:
+                if payload["_id"] in self.documents:
+                    return httpx.Response(409, text="duplicate")
+                self.documents[payload["_id"]] = payload
+                return httpx.Response(201, json=payload)
+            case "PUT" | "PATCH", [_, identifier]:
+                if request.method == "PUT":
+                    self.documents[identifier] = payload
+                else:
+                    self.documents[identifier].update(payload)
+                return httpx.Response(200, json=self.documents[identifier])
+            case "DELETE", [_, identifier]:
+                del self.documents[identifier]
+                return httpx.Response(204)
+            case method, [_, identifier, "metadata"]:
+                document = self.documents[identifier]
+                if method == "PATCH" and not document.get("metadata"):
+                    return httpx.Response(
+                        400, json={"message": f"Entity {identifier} has no metadata"}
+                    )
+                document["metadata"] = document.get("metadata", []) + payload
+                return httpx.Response(201, json=document["metadata"])
+            case "PATCH", [_, identifier, "relations"]:
+                self.documents[identifier]["relations"] = payload
+                return httpx.Response(200, json=payload)
+        return httpx.Response(404)
+
+    def __get_file(self, request):
+        if range_header := request.headers.get("Range"):
+            start = int(range_header.removeprefix("bytes=").rstrip("-"))
+            return httpx.Response(
+                206,
+                content=self.file_content[start:],
+                headers={"Content-Length": str(len(self.file_content) - start)},
+            )
+        return httpx.Response(
+            200,
+            content=self.file_content,
+            headers={"Content-Length": str(len(self.file_content))},
+        )
+
+
+def _run(api, function, **kwargs):
+    async def run():
+        with patch(
+            "elody.async_client.httpx.AsyncClient",
+            partial(httpx.AsyncClient, transport=httpx.MockTransport(api.handle)),
+        ):
+            client = AsyncClient(
+                "http://collection",
+                "jwt",
+                elody_storage_api_url="http://storage",
+                **{"retry_policy": RetryPolicy(max_attempts=1), **kwargs},
+            )
+        async with client:
+            return await function(client)
+
+    return asyncio.run(run())
+
+
+def test_crud_methods_send_requests_to_the_collection():
+    api = FakeElodyApi([{"_id": "1", "title": "one"}])
+
+    async def crud(client):
+        created = await client.add_object("entities", {"_id": "2"}, {"soft": 1})
+        updated = await client.update_object(
+            "entities", "2", {"title": "two"}, overwrite=False
+        )
+        replaced = await client.update_object("entities", "1", {"_id": "1"})
+        relations = await client.update_object_relations(
+            "entities", "1", [{"key": "2", "type": "isIn"}]
+        )
+        deleted = await client.delete_object("entities", "2")
+        return created, updated, replaced, relations, deleted
+
+    created, updated, replaced, relations, deleted = _run(api, crud)
+    assert created == {"_id": "2"}
+    assert updated == {"_id": "2", "title": "two"}
+    assert replaced == {"_id": "1"}
+    assert relations == [{"key": "2", "type": "isIn"}]
+    assert deleted == ""
+    assert [request.method for request in api.requests] == [
+        "POST",
+        "PATCH",
+        "PUT",
+        "PATCH",
+        "DELETE",
+    ]
+    assert api.requests[0].url.params["soft"] == "1"
+    assert all(
+        request.headers["Authorization"] == "Bearer jwt" for request in api.requests
+    )
+    assert api.documents == {"1": {"_id": "1", "relations": relations}}
+
+
+def test_get_methods_decode_responses():
+    api = FakeElodyApi([{"_id": "1"}, {"_id": "2"}])
+
+    async def get(client):
+        return (
+            await client.get_object("entities", "1"),
+            await client.get_all_objects("entities"),
+            await client.get_mediafiles_and_check_existence(["2", "1"]),
+        )
+
+    document, page, mediafiles = _run(api, get)
+    assert document == {"_id": "1"}
+    assert page == {"count": 2, "results": [{"_id": "1"}, {"_id": "2"}]}
+    assert mediafiles == [{"_id": "2"}, {"_id": "1"}]
+
+
+def test_errors_are_raised_as_elody_exceptions():
+    api = FakeElodyApi([{"_id": "1"}])
+    with pytest.raises(NotFoundException):
+        _run(api, lambda client: client.get_object("entities", "missing"))
+    with pytest.raises(NonUniqueException):
+        _run(api, lambda client: client.add_object("entities", {"_id": "1"}))
+
+
+def test_add_object_metadata_falls_back_to_post():
+    api = FakeElodyApi([{"_id": "1"}])
+
+    async def add_metadata(client):
+        await client.add_object_metadata("entities", "1", {"key": "a", "value": "b"})
+        return await client.add_object_metadata(
+            "entities", "1", [{"key": "c", "value": "d"}]
+        )
+
+    metadata = _run(api, add_metadata)
+    assert metadata == [{"key": "a", "value": "b"}, {"key": "c", "value": "d"}]
+    assert [request.method for request in api.requests] == ["PATCH", "POST", "PATCH"]
+
+
+def test_requests_are_retried_by_the_retry_policy():
+    api = FakeElodyApi([{"_id": "1"}])
+    api.responses[("GET", "/entities/1")] = [httpx.Response(503)]
+    retry_policy = RetryPolicy(max_attempts=2, backoff_factor=0)
+    document = _run(
+        api,
+        lambda client: client.get_object("entities", "1"),
+        retry_policy=retry_policy,
+    )
+    assert document == {"_id": "1"}
+    assert len(api.requests) == 2
+
+
+def test_max_concurrency_bounds_requests_in_flight():
+    api = FakeElodyApi([{"_id": str(index)} for index in range(10)])
+    mediafiles = _run(
+        api,
+        lambda client: client.get_mediafiles_and_check_existence(map(str, range(10))),
+        max_concurrency=3,
+    )
+    assert [mediafile["_id"] for mediafile in mediafiles] == list(map(str, range(10)))
+    assert api.max_in_flight == 3
+
+
+def test_upload_file_from_url_streams_chunks_and_completes():
+    api = FakeElodyApi(file_content=b"elody" * 100)
+    events = list()
+    response = _run(
+        api,
+        lambda client: client.upload_file_from_url(
+            "entity",
+            "file.txt",
+            "http://storage/file",
+            user_email="user@example.com",
+            progress_handler=lambda event, data: events.append((event, data)),
+        ),
+    )
+    assert response == {"_id": "entity-file"}
+    init_request = [x for x in api.requests if x.url.path == "/upload/init-stream"]
+    assert init_request[0].url.params["mediafile_id"] == "entity-file"
+    assert api.completed["chunks_info"] == [
+        {"sequence_number": 1, "hash": md5(b"elody" * 100).hexdigest()}
+    ]
+    assert api.completed["file_info"] == {
+        "md5sum": md5(b"elody" * 100).hexdigest(),
+        "name": "file.txt",
+    }
+    assert [event for event, _ in events] == [
+        "upload_location",
+        "chunk_signed",
+        "chunk_uploaded",
+        "progress",
+        "completed",
+    ]
+    assert events[0][1]["upload_location"].endswith("&user_email=user@example.com")
+    assert events[3][1]["bytes_sent"] == events[3][1]["total_size"] == 500
+    assert not api.aborted
+
+
+def test_upload_file_from_url_resumes_after_a_retryable_error():
+    file_content = bytes(range(10))
+    api = FakeElodyApi(file_content=file_content)
+    api.responses[("PUT", "/chunk/3")] = [httpx.Response(503)]
+    events = list()
+    response = _run(
+        api,
+        lambda client: client.upload_file_from_url(
+            "entity",
+            "file.bin",
+            "http://storage/file",
+            chunk_size=3,
+            progress_handler=lambda event, data: events.append(event),
+        ),
+        retry_policy=RetryPolicy(max_attempts=2, backoff_factor=0),
+    )
+    assert response == {"_id": "entity-file"}
+    file_requests = [x for x in api.requests if x.url.path == "/file"]
+    assert "Range" not in file_requests[0].headers
+    assert file_requests[1].headers["Range"] == "bytes=6-"
+    assert api.get_paths("PUT") == [
+        "/chunk/1",
+        "/chunk/2",
+        "/chunk/3",
+        "/chunk/3",
+        "/chunk/4",
+    ]
+    assert api.completed["file_info"]["md5sum"] == md5(file_content).hexdigest()
+    assert [x["sequence_number"] for x in api.completed["chunks_info"]] == [
+        1,
+        2,
+        3,
+        4,
+    ]
+    uploaded_chunks = api.uploaded_chunks["entity-file"]
+    assert b"".join(uploaded_chunks[x][1] for x in range(1, 5)) == file_content
+    assert events.count("retry") == 1
+
+
+def test_upload_file_from_url_uses_the_client_chunk_size():
+    api = FakeElodyApi(file_content=b"elody" * 2)
+    assert AsyncClient("http://collection").upload_chunk_size == (
+        DEFAULT_UPLOAD_CHUNK_SIZE
+    )
+    _run(
+        api,
+        lambda client: client.upload_file_from_url(
+            "entity", "file.txt", "http://storage/file"
+        ),
+        upload_chunk_size=4,
+    )
+    assert [len(x) for _, x in api.uploaded_chunks["entity-file"].values()] == [
+        4,
+        4,
+        2,
+    ]
+
+
+def test_concurrent_uploads_share_max_concurrency():
+    api = FakeElodyApi(file_content=b"elody" * 2)
+
+    async def upload(client):
+        return await asyncio.wait_for(
+            asyncio.gather(
+                *[
+                    client.upload_file_from_url(
+                        str(entity), "file.txt", "http://storage/file", chunk_size=4
+                    )
+                    for entity in range(5)
+                ]
+            ),
+            timeout=5,
+        )
+
+    responses = _run(api, upload, max_concurrency=2)
+    assert responses == [{"_id": f"{entity}-file"} for entity in range(5)]
+    assert api.max_in_flight <= 2
+    with pytest.raises(ValueError):
+        _run(api, upload, max_concurrency=1)
+
+
+def test_upload_file_from_url_aborts_on_a_permanent_error():
+    api = FakeElodyApi(file_content=b"elody")
+    api.put_errors = [403]
+    events = list()
+    with pytest.raises(httpx.HTTPStatusError):
+        _run(
+            api,
+            lambda client: client.upload_file_from_url(
+                "entity",
+                "file.txt",
+                "http://storage/file",
+                progress_handler=lambda event, data: events.append(event),
+            ),
+            retry_policy=RetryPolicy(max_attempts=3, backoff_factor=0),
+        )
+    assert api.aborted
+    assert api.completed is None
+    assert events[-1] == "aborted"
+    assert api.get_paths("PUT") == ["/chunk/1"]
@@ -0,0 +1,70 @@
+from elody.cache import DocumentCache
+from unittest.mock import patch
+
+
+def test_get_returns_none_for_unknown_key():
+    cache = DocumentCache()
+    assert cache.get(("entities", "unknown")) is None
+    assert cache.get_statistics()["misses"] == 1
+
+
+def test_put_stores_a_copy_of_the_document():
+    cache = DocumentCache()
+    document = {"_id": "1", "metadata": []}
+    cache.put(("entities", "1"), '"1"', document)
+    document["metadata"].append({"key": "title", "value": "changed"})
+    assert cache.get(("entities", "1"))["document"] == {"_id": "1", "metadata": []}
+
+
+def test_entries_without_ttl_always_need_revalidation():
+    cache = DocumentCache()
+    cache.put(("entities", "1"), '"1"', {"_id": "1"})
+    entry = cache.get(("entities", "1"))
+    assert entry["fresh"] is False
+    assert entry["etag"] == '"1"'
+
+
+@patch("elody.cache.monotonic")
+def test_entries_are_fresh_within_ttl(mock_monotonic):
+    cache = DocumentCache(ttl=10)
+    mock_monotonic.return_value = 100
+    cache.put(("entities", "1"), '"1"', {"_id": "1"})
+    mock_monotonic.return_value = 105
+    assert cache.get(("entities", "1"))["fresh"] is True
+    mock_monotonic.return_value = 111
+    assert cache.get(("entities", "1"))["fresh"] is False
+    cache.mark_not_modified(("entities", "1"))
+    assert cache.get(("entities", "1"))["fresh"] is True
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = DocumentCache(max_size=2)
+    cache.put(("entities", "1"), None, {"_id": "1"})
+    cache.put(("entities", "2"), None, {"_id": "2"})
+    cache.get(("entities", "1"))
+    cache.put(("entities", "3"), None, {"_id": "3"})
+    assert cache.get(("entities", "2")) is None
+    assert cache.get(("entities", "1")) is not None
+    assert cache.get(("entities", "3")) is not None
+
+
+def test_invalidate_removes_entry():
+    cache = DocumentCache()
+    cache.put(("entities", "1"), '"1"', {"_id": "1"})
+    cache.invalidate(("entities", "1"))
+    assert cache.get(("entities", "1")) is None
+    assert cache.get_statistics()["invalidations"] == 1
+
+
+def test_invalidate_removes_entries_cached_under_any_alias():
+    cache = DocumentCache()
+    document = {"_id": "1", "identifiers": ["alias", "other"]}
+    cache.put(("entities", "1"), '"1"', document)
+    cache.put(("entities", "other"), '"1"', document)
+    cache.put(("mediafiles", "alias"), '"1"', {"_id": "2"})
+    cache.invalidate(("entities", "alias"))
+    assert cache.get(("entities", "1")) is None
+    assert cache.get(("entities", "other")) is None
+    assert cache.get(("mediafiles", "alias")) is not None
+    assert cache.get_statistics()["invalidations"] == 2
+    assert cache.aliases.keys() == {("mediafiles", "alias"), ("mediafiles", "2")}
@@ -0,0 +1,708 @@
+import gzip
+import json
+import pytest
+
+from concurrent.futures import ThreadPoolExecutor
+from elody.client import Client
+from elody.credentials import RefreshingTokenProvider
+from elody.exceptions import NotFoundException
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import BytesIO
+from requests import Response
+from threading import Lock, Thread, get_ident
+from time import sleep
+from unittest.mock import MagicMock, patch
+from urllib.parse import parse_qs, urlparse
+
+
+def _send(adapter, request, **kwargs):
+    identifier = request.url.rsplit("/", 1)[-1]
+    response = Response()
+    response.status_code = 200
+    response.url = request.url
+    response.request = request
+    response._content = json.dumps(
+        {
+            "_id": identifier,
+            "authorization": request.headers["Authorization"],
+            "thread": get_ident(),
+        }
+    ).encode()
+    return response
+
+
+class FakeCollectionApi:
+    def __init__(self, documents=()):
+        self.documents = {
+            document["_id"]: {**document, "version": 1} for document in documents
+        }
+        self.requests = list()
+        self.responses = list()
+        self.failing_identifiers = set()
+        self.include_count = True
+        self.lock = Lock()
+
+    def send(self, request, **kwargs):
+        url = urlparse(request.url)
+        query = {key: value[0] for key, value in parse_qs(url.query).items()}
+        path = url.path.strip("/").split("/")
+        with self.lock:
+            self.requests.append(request)
+            payload = self.__decode_body(request)
+            match request.method, path:
+                case "GET", [_]:
+                    return self.__get_documents(request, query)
+                case "GET", [_, identifier]:
+                    return self.__get_document(request, identifier)
+                case "POST", [_]:
+                    identifier = payload.get("_id") or payload["identifiers"][0]
+                    if identifier in self.failing_identifiers:
+                        return self.__json(request, 400, {"message": "invalid"})
+                    self.documents[identifier] = {
+                        **payload,
+                        "_id": identifier,
+                        "version": 1,
+                    }
+                    return self.__json(request, 201, self.documents[identifier])
+                case "PUT" | "PATCH", [_, identifier]:
+                    document = self.__find(identifier)
+                    document.update(payload)
+                    document["version"] += 1
+                    return self.__json(request, 200, document)
+                case "DELETE", [_, identifier]:
+                    del self.documents[self.__find(identifier)["_id"]]
+                    return self.__response(request, 204, b"")
+                case method, [_, identifier, "metadata"]:
+                    document = self.__find(identifier)
+                    if identifier in self.failing_identifiers:
+                        return self.__json(request, 400, {"message": "invalid"})
+                    if method == "PATCH" and not document.get("metadata"):
+                        return self.__json(
+                            request,
+                            400,
+                            {"message": f"Entity {identifier} has no metadata"},
+                        )
+                    document["metadata"] = document.get("metadata", []) + payload
+                    document["version"] += 1
+                    return self.__json(request, 201, document["metadata"])
+                case "PATCH", [_, identifier, "relations"]:
+                    if identifier in self.failing_identifiers:
+                        return self.__json(request, 400, {"message": "invalid"})
+                    document = self.__find(identifier)
+                    document["relations"] = payload
+                    document["version"] += 1
+                    return self.__json(request, 200, payload)
+        return self.__response(request, 404, b"")
+
+    def get_requests(self, method=None):
+        return [
+            request
+            for request in self.requests
+            if method is None or request.method == method
+        ]
+
+    def __decode_body(self, request):
+        if not request.body:
+            return None
+        if request.headers.get("Content-Encoding") == "gzip":
+            return json.loads(gzip.decompress(request.body))
+        return json.loads(request.body)
+
+    def __find(self, identifier):
+        for document in self.documents.values():
+            if identifier in [document["_id"], *document.get("identifiers", [])]:
+                return document
+        return None
+
+    def __get_document(self, request, identifier):
+        document = self.__find(identifier)
+        if not document:
+            return self.__response(request, 404, b"not found")
+        etag = f'"{document["version"]}"'
+        if request.headers.get("If-None-Match") == etag:
+            response = self.__response(request, 304, b"")
+        else:
+            response = self.__json(request, 200, document)
+        response.headers["ETag"] = etag
+        return response
+
+    def __get_documents(self, request, query):
+        documents = list(self.documents.values())
+        if "ids" in query:
+            ids = query["ids"].split(",")
+            documents = [x for x in documents if x["_id"] in ids]
+        skip = int(query.get("skip", 0))
+        limit = int(query.get("limit", len(documents)))
+        page = {"results": documents[skip : skip + limit]}
+        if self.include_count:
+            page["count"] = len(documents)
+        return self.__json(request, 200, page)
+
+    def __json(self, request, status_code, payload):
+        return self.__response(request, status_code, json.dumps(payload).encode())
+
+    def __response(self, request, status_code, content):
+        response = Response()
+        response.status_code = status_code
+        response.url = request.url
+        response.request = request
+        response.raw = BytesIO(content)
+        self.responses.append(response)
+        return response
+
+
+def test_client_can_be_shared_by_a_worker_pool():
+    client = Client("http://collection", "jwt", proxy="http://proxy:3128")
+    sessions = set()
+    sessions_lock = Lock()
+
+    def get_object(identifier):
+        with sessions_lock:
+            sessions.add(id(client.session))
+        return client.get_object("entities", identifier)
+
+    with patch("elody.client.HTTPAdapter.send", _send):
+        with ThreadPoolExecutor(max_workers=16) as executor:
+            documents = list(executor.map(get_object, map(str, range(2000))))
+
+    assert [document["_id"] for document in documents] == list(map(str, range(2000)))
+    assert all(document["authorization"] == "Bearer jwt" for document in documents)
+    assert len(sessions) == len({document["thread"] for document in documents})
+    assert dict(client.proxies) == {
+        "https": "http://proxy:3128",
+        "http": "http://proxy:3128",
+    }
+
+
+def test_sessions_share_one_connection_pool():
+    client = Client("http://collection", "jwt")
+    sessions = []
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        for _ in range(4):
+            sessions.append(executor.submit(lambda: client.session).result())
+    assert all(
+        session.get_adapter("http://collection") is client.adapter
+        for session in sessions
+    )
+    assert client.session is client.session
+
+
+def test_bulk_requests_share_the_client():
+    client = Client("http://collection", "jwt")
+    with patch("elody.client.HTTPAdapter.send", _send):
+        results, errors = client.get_objects(
+            "entities", list(map(str, range(500))), max_workers=32
+        )
+    assert errors == {}
+    assert sorted(result["_id"] for result in results) == sorted(map(str, range(500)))
+
+
+def test_headers_are_immutable_snapshots():
+    client = Client("http://collection", "jwt", {"X-Tenant": "a"})
+    headers = client.headers
+    with pytest.raises(TypeError):
+        headers["X-Tenant"] = "b"
+    client.headers = {**client.headers, "X-Tenant": "c"}
+    assert headers["X-Tenant"] == "a"
+    assert client.headers["X-Tenant"] == "c"
+
+
+def test_client_rotates_token_without_new_session():
+    fetch_token = MagicMock(side_effect=[("first", 3600), ("second", 3600)])
+    client = Client(
+        "http://collection", credential_provider=RefreshingTokenProvider(fetch_token)
+    )
+    session = client.session
+    headers = client.headers
+    assert client.headers is headers
+    with patch("elody.client.HTTPAdapter.send", _send):
+        assert client.get_object("entities", "1")["authorization"] == "Bearer first"
+        client.refresh_credentials()
+        assert client.get_object("entities", "1")["authorization"] == "Bearer second"
+    assert client.session is session
+
+
+def test_client_refreshes_token_once_on_unauthorized():
+    fetch_token = MagicMock(side_effect=[("expired", 3600), ("valid", 3600)])
+    client = Client(
+        "http://collection", credential_provider=RefreshingTokenProvider(fetch_token)
+    )
+
+    def send(adapter, request, **kwargs):
+        response = _send(adapter, request, **kwargs)
+        if request.headers["Authorization"] != "Bearer valid":
+            response.status_code = 401
+        return response
+
+    with patch("elody.client.HTTPAdapter.send", send):
+        assert client.get_object("entities", "1")["authorization"] == "Bearer valid"
+    assert fetch_token.call_count == 2
+
+
+def test_headers_keep_extra_headers_across_token_refresh():
+    fetch_token = MagicMock(side_effect=[("first", 3600), ("second", 3600)])
+    client = Client(
+        "http://collection",
+        extra_headers={"X-Tenant": "a"},
+        credential_provider=RefreshingTokenProvider(fetch_token),
+    )
+    client.headers = {**client.headers, "X-Tenant": "b"}
+    client.refresh_credentials()
+    assert dict(client.headers) == {"Authorization": "Bearer second", "X-Tenant": "b"}
+
+
+def test_get_object_revalidates_cached_document():
+    collection_api = FakeCollectionApi([{"_id": "1", "identifiers": ["alias"]}])
+    client = Client("http://collection", "jwt", document_cache_size=10)
+    with patch("elody.client.HTTPAdapter.send", collection_api.send):
+        assert client.get_object("entities", "1")["version"] == 1
+        document = client.get_object("entities", "1")
+    requests = collection_api.get_requests("GET")
+    assert "If-None-Match" not in requests[0].headers
+    assert requests[1].headers["If-None-Match"] == '"1"'
+    assert document["version"] == 1
+    assert client.get_document_cache_statistics()["not_modified"] == 1
+
+
+def test_get_object_refreshes_changed_document():
+    collection_api = FakeCollectionApi([{"_id": "1"}])
+    client = Client("http://collection", "jwt", document_cache_size=10)
+    with patch("elody.client.HTTPAdapter.send", collection_api.send):
+        client.get_object("entities", "1")
+        collection_api.documents["1"]["version"] = 2
+        assert client.get_object("entities", "1")["version"] == 2
+    assert client.get_document_cache_statistics()["not_modified"] == 0
+
+
+@pytest.mark.parametrize(
+    "change_object",
+    [
+        lambda client, identifier: client.update_object(
+            "entities", identifier, {"title": "changed"}
+        ),
+        lambda client, identifier: client.update_object_relations(
+            "entities", identifier, []
+        ),
+        lambda client, identifier: client.add_object_metadata(
+            "entities", identifier, {"key": "title", "value": "changed"}
+        ),
+        lambda client, identifier: client.delete_object("entities", identifier),
+    ],
+)
+def test_changing_an_object_invalidates_all_its_aliases(change_object):
+    collection_api = FakeCollectionApi(
+        [{"_id": "1", "identifiers": ["alias"], "metadata": []}]
+    )
+    client = Client("http://collection", "jwt", document_cache_size=10)
+    with patch("elody.client.HTTPAdapter.send", collection_api.send):
+        client.get_object("entities", "1")
+        client.get_object("entities", "alias")
+        change_object(client, "alias")
+        assert client.get_document_cache_statistics()["size"] == 0
+        collection_api.requests.clear()
+        try:
+            client.get_object("entities", "1")
+        except Exception:
+            pass
+    assert "If-None-Match" not in collection_api.get_requests("GET")[0].headers
+
+
+def _get_metadata_methods(collection_api):
+    return [
+        request.method
+        for request in collection_api.requests
+        if request.url.endswith("/metadata")
+    ]
+
+
+def test_add_object_metadata_posts_when_entity_is_known_without_metadata():
+    collection_api = FakeCollectionApi()
+    client = Client("http://collection", "jwt")
+    with patch("elody.client.HTTPAdapter.send", collection_api.send):
+        client.add_object("entities", {"_id": "1", "identifiers": ["alias"]})
+        client.add_object_metadata("entities", "alias", {"key": "a", "value": "b"})
+    assert _get_metadata_methods(collection_api) == ["POST"]
+    assert client.get_metadata_statistics() == {
+        "fallbacks": 0,
+        "avoided_fallbacks": 1,
+        "known_entities": 2,
+    }
+
+
+def test_add_object_metadata_patches_when_entity_is_known_with_metadata():
+    collection_api = FakeCollectionApi(
+        [{"_id": "1", "metadata": [{"key": "a", "value": "b"}]}]
+    )
+    client = Client("http://collection", "jwt")
+    with patch("elody.client.HTTPAdapter.send", collection_api.send):
+        client.get_object("entities", "1")
+        client.add_object_metadata("entities", "1", {"key": "c", "value": "d"})
+    assert _get_metadata_methods(collection_api) == ["PATCH"]
+    assert client.get_metadata_statistics()["fallbacks"] == 0
+    assert client.get_metadata_statistics()["avoided_fallbacks"] == 0
+
+
+def test_add_object_metadata_falls_back_to_post_for_unknown_entity():
+    collection_api = FakeCollectionApi([{"_id": "1"}])
+    client = Client("http://collection", "jwt")
+    with patch("elody.client.HTTPAdapter.send", collection_api.send):
+        metadata = client.add_object_metadata(
+            "entities", "1", {"key": "a", "value": "b"}
+        )
+        client.add_object_metadata("entities", "1", {"key": "c", "value": "d"})
+    assert metadata == [{"key": "a", "value": "b"}]
+    assert _get_metadata_methods(collection_api) == ["PATCH", "POST", "PATCH"]
+    assert client.get_metadata_statistics() == {
+        "fallbacks": 1,
+        "avoided_fallbacks": 0,
+        "known_entities": 1,
+    }
+
+
+def test_failed_metadata_update_forgets_metadata_state():
+    collection_api = FakeCollectionApi([{"_id": "1"}])
+    client = Client("http://collection", "jwt")
+    with patch("elody.client.HTTPAdapter.send", collection_api.send):
+        client.get_object("entities", "1")
+        collection_api.failing_identifiers.add("1")
+        with pytest.raises(Exception):
+            client.add_object_metadata("entities", "1", {"key": "a", "value": "b"})
+    assert client.get_metadata_statistics()["known_entities"] == 0
+
+
+def test_metadata_states_are_bounded():
+    collection_api = FakeCollectionApi()
+    client = Client("http://collection", "jwt", metadata_state_cache_size=2)
+    with patch("elody.client.HTTPAdapter.send", collection_api.send):
+        for identifier in ["1", "2", "3"]:
+            client.add_object("entities", {"_id": identifier})
+        client.add_object_metadata("entities", "1", {"key": "a", "value": "b"})
+    assert _get_metadata_methods(collection_api) == ["PATCH", "POST"]
+    assert client.get_metadata_statistics()["known_entities"] == 2
+
+
+def test_small_request_bodies_are_not_compressed():
+    collection_api = FakeCollectionApi()
+    client = Client("http://collection", "jwt", compression="gzip")
+    with patch("elody.client.HTTPAdapter.send", collection_api.send):
+        client.add_object("entities", {"_id": "1"})
+    request = collection_api.get_requests("POST")[0]
+    assert "Content-Encoding" not in request.headers
+    assert json.loads(request.body) == {"_id": "1"}
+    assert client.get_compression_statistics()["compressed_requests"] == 0
+
+
+@pytest.mark.parametrize("compression_level, expected_level", [(None, 1), (6, 6)])
+def test_large_request_bodies_are_gzipped(compression_level, expected_level):
+    collection_api = FakeCollectionApi()
+    client = Client(
+        "http://collection",
+        "jwt",
+        compression="gzip",
+        compression_threshold=100,
+        compression_level=compression_level,
+    )
+    payload = {"_id": "1", "description": "x" * 1000}
+    with (
+        patch("elody.client.HTTPAdapter.send", collection_api.send),
+        patch("elody.client.gzip.compress", wraps=gzip.compress) as compress,
+    ):
+        client.add_object("entities", payload)
+    request = collection_api.get_requests("POST")[0]
+    assert request.headers["Content-Encoding"] == "gzip"
+    assert request.headers["Content-Type"] == "application/json"
+    assert json.loads(gzip.decompress(request.body)) == payload
+    assert compress.call_args.kwargs["compresslevel"] == expected_level
+    statistics = client.get_compression_statistics()
+    assert statistics["compressed_requests"] == 1
+    assert statistics["request_bytes"] == len(json.dumps(payload))
+    assert statistics["request_wire_bytes"] == len(request.body)
+    assert statistics["request_wire_bytes"] < statistics["request_bytes"]
+
+
+@pytest.mark.parametrize(
+    "client_backend, call_backend, orjson_calls",
+    [("json", None, 0), ("orjson", None, 1), ("json", "orjson", 1)],
+)
+def test_json_backend_decodes_responses(client_backend, call_backend, orjson_calls):
+    import orjson
+
+    collection_api = FakeCollectionApi([{"_id": "1", "value": 1.5}])
+    client = Client("http://collection", "jwt", json_backend=client_backend)
+    with (
+        patch("elody.client.HTTPAdapter.send", collection_api.send),
+        patch("orjson.loads", wraps=orjson.loads) as loads,
+    ):
+        page = client.get_all_objects("entities", json_backend=call_backend)
+    assert page == {"count": 1, "results": [{"_id": "1", "value": 1.5, "version": 1}]}
+    assert loads.call_count == orjson_calls
+
+
+def test_streamed_objects_are_decoded_incrementally():
+    collection_api = FakeCollectionApi([{"_id": "1", "value": 1.5}, {"_id": "2"}])
+    client = Client("http://collection", "jwt")
+    with patch("elody.client.HTTPAdapter.send", collection_api.send):
+        objects = client.get_all_objects("entities", stream=True)
+    response = collection_api.responses[0]
+    assert response.raw.tell() == 0
+    assert next(objects) == {"_id": "1", "value": 1.5, "version": 1}
+    assert isinstance(next(objects)["version"], int)
+    with pytest.raises(StopIteration):
+        next(objects)
+    assert response.raw.closed
+
+
+def _track_concurrency(send, statistics):
+    lock = Lock()
+
+    def tracking_send(adapter, request, **kwargs):
+        with lock:
+            statistics["in_flight"] += 1
+            statistics["max_in_flight"] = max(
+                statistics["max_in_flight"], statistics["in_flight"]
+            )
+        try:
+            sleep(0.02)
+            return send(request, **kwargs)
+        finally:
+            with lock:
+                statistics["in_flight"] -= 1
+
+    return tracking_send
+
+
+@pytest.mark.parametrize("max_workers, batch_size, expected", [(4, 2, 2), (3, 10, 3)])
+def test_add_objects_bounds_concurrency(max_workers, batch_size, expected):
+    collection_api = FakeCollectionApi()
+    statistics = {"in_flight": 0, "max_in_flight": 0}
+    client = Client("http://collection", "jwt")
+    with patch(
+        "elody.client.HTTPAdapter.send",
+        _track_concurrency(collection_api.send, statistics),
+    ):
+        results, errors = client.add_objects(
+            "entities",
+            ({"_id": str(index)} for index in range(9)),
+            max_workers=max_workers,
+            batch_size=batch_size,
+        )
+    assert errors == {}
+    assert [result["_id"] for result in results] == [str(x) for x in range(9)]
+    assert 1 < statistics["max_in_flight"] <= expected
+
+
+def test_add_objects_reports_errors_by_input_index():
+    collection_api = FakeCollectionApi()
+    collection_api.failing_identifiers.update({"2", "5"})
+    client = Client("http://collection", "jwt")
+    with patch("elody.client.HTTPAdapter.send", collection_api.send):
+        results, errors = client.add_objects(
+            "entities",
+            [{"_id": str(index)} for index in range(7)],
+            max_workers=3,
+            batch_size=3,
+        )
+    assert errors.keys() == {2, 5}
+    assert "invalid" in str(errors[5])
+    assert [result and result["_id"] for result in results] == [
+        "0",
+        "1",
+        None,
+        "3",
+        "4",
+        None,
+        "6",
+    ]
+
+
+def test_patch_objects_metadata_reports_results_and_errors_by_identifier():
+    collection_api = FakeCollectionApi(
+        [{"_id": "1", "identifiers": ["alias"]}, {"_id": "2"}, {"_id": "3"}]
+    )
+    collection_api.failing_identifiers.add("2")
+    client = Client("http://collection", "jwt")
+    with patch("elody.client.HTTPAdapter.send", collection_api.send):
+        results, errors = client.patch_objects_metadata(
+            "entities",
+            {
+                "alias": {"key": "a", "value": "1"},
+                "2": {"key": "a", "value": "2"},
+                "3": [{"key": "a", "value": "3"}],
+            },
+            max_workers=2,
+            batch_size=2,
+        )
+    assert results == {
+        "alias": [{"key": "a", "value": "1"}],
+        "3": [{"key": "a", "value": "3"}],
+    }
+    assert list(errors.keys()) == ["2"]
+
+
+def test_update_relations_bulk_reports_results_and_errors_by_identifier():
+    collection_api = FakeCollectionApi([{"_id": "1"}, {"_id": "2"}, {"_id": "3"}])
+    collection_api.failing_identifiers.add("1")
+    relations = {
+        identifier: [{"key": "parent", "type": "isIn", "value": identifier}]
+        for identifier in ["1", "2", "3"]
+    }
+    client = Client("http://collection", "jwt")
+    with patch("elody.client.HTTPAdapter.send", collection_api.send):
+        results, errors = client.update_relations_bulk(
+            "entities", relations, max_workers=3
+        )
+    assert results == {"2": relations["2"], "3": relations["3"]}
+    assert list(errors.keys()) == ["1"]
+    assert collection_api.documents["3"]["relations"] == relations["3"]
+
+
+@pytest.mark.parametrize("prefetch", [False, True])
+@pytest.mark.parametrize(
+    "documents, include_count, expected_skips",
+    [
+        (0, True, [0]),
+        (7, True, [0, 3, 6]),
+        (7, False, [0, 3, 6]),
+        (6, True, [0, 3]),
+        (6, False, [0, 3, 6]),
+    ],
+)
+def test_iter_objects_pages_until_the_last_page(
+    documents, include_count, expected_skips, prefetch
+):
+    collection_api = FakeCollectionApi([{"_id": str(x)} for x in range(documents)])
+    collection_api.include_count = include_count
+    client = Client("http://collection", "jwt")
+    with patch("elody.client.HTTPAdapter.send", collection_api.send):
+        objects = client.iter_objects(
+            "entities", page_size=3, filters={"type": "asset"}, prefetch=prefetch
+        )
+        identifiers = [document["_id"] for document in objects]
+    assert identifiers == [str(x) for x in range(documents)]
+    queries = [parse_qs(urlparse(x.url).query) for x in collection_api.requests]
+    assert [int(query["skip"][0]) for query in queries] == expected_skips
+    assert all(query["limit"] == ["3"] for query in queries)
+    assert all(query["type"] == ["asset"] for query in queries)
+
+
+def test_iter_objects_fetches_pages_lazily():
+    collection_api = FakeCollectionApi([{"_id": str(x)} for x in range(7)])
+    client = Client("http://collection", "jwt")
+    with patch("elody.client.HTTPAdapter.send", collection_api.send):
+        objects = client.iter_objects("entities", page_size=3)
+        assert next(objects)["_id"] == "0"
+        assert len(collection_api.requests) == 1
+        objects.close()
+    assert len(collection_api.requests) == 1
+
+
+def test_get_objects_batches_identifiers_into_ids_queries():
+    collection_api = FakeCollectionApi([{"_id": str(x)} for x in range(5)])
+    client = Client("http://collection", "jwt")
+    identifiers = ["4", "missing", "0", "3", "1"]
+    with patch("elody.client.HTTPAdapter.send", collection_api.send):
+        results, errors = client.get_objects(
+            "entities", iter(identifiers), use_ids_query=True, ids_query_batch_size=2
+        )
+    queries = [parse_qs(urlparse(x.url).query) for x in collection_api.requests]
+    assert sorted((query["ids"][0], query["limit"][0]) for query in queries) == [
+        ("0,3", "2"),
+        ("1", "1"),
+        ("4,missing", "2"),
+    ]
+    assert [result and result["_id"] for result in results] == [
+        "4",
+        None,
+        "0",
+        "3",
+        "1",
+    ]
+    assert list(errors.keys()) == ["missing"]
+    assert isinstance(errors["missing"], NotFoundException)
+
+
+def test_get_objects_without_ids_query_gets_each_object():
+    collection_api = FakeCollectionApi([{"_id": "1"}, {"_id": "2"}])
+    client = Client("http://collection", "jwt")
+    with patch("elody.client.HTTPAdapter.send", collection_api.send):
+        results, errors = client.get_objects("entities", ["2", "missing", "1"])
+    assert len(collection_api.requests) == 3
+    assert [result and result["_id"] for result in results] == ["2", None, "1"]
+    assert isinstance(errors["missing"], NotFoundException)
+
+
+class _CollectionHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        self.server.connections += 1
+
+    def do_GET(self):
+        body = json.dumps({"_id": self.path.rsplit("/", 1)[-1]}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        if self.headers.get("Connection") == "close":
+            self.send_header("Connection", "close")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def collection_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _CollectionHandler)
+    server.connections = 0
+    thread = Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_client_configures_the_shared_adapter():
+    client = Client(
+        "http://collection",
+        "jwt",
+        pool_connections=4,
+        pool_maxsize=16,
+        pool_block=True,
+    )
+    assert client.adapter._pool_connections == 4
+    assert client.adapter._pool_maxsize == 16
+    assert client.adapter._pool_block is True
+    assert client.adapter.max_retries.total == 0
+    assert client.session.headers["Connection"] == "keep-alive"
+
+
+def test_pool_metrics_count_connections_and_requests(collection_server):
+    collection_url = f"http://127.0.0.1:{collection_server.server_port}"
+    client = Client(collection_url, "jwt", pool_maxsize=8)
+    assert client.get_pool_metrics() == {}
+    for identifier in ["1", "2", "3"]:
+        assert client.get_object("entities", identifier) == {"_id": identifier}
+    assert client.get_pool_metrics() == {
+        collection_url: {
+            "connections_opened": 1,
+            "requests": 3,
+            "idle_connections": 1,
+            "maxsize": 8,
+        }
+    }
+    assert collection_server.connections == 1
+    client.close()
+    assert client.get_pool_metrics() == {}
+
+
+def test_client_without_keep_alive_reconnects_for_every_request(collection_server):
+    collection_url = f"http://127.0.0.1:{collection_server.server_port}"
+    client = Client(collection_url, "jwt", keep_alive=False)
+    for identifier in ["1", "2", "3"]:
+        assert client.get_object("entities", identifier) == {"_id": identifier}
+    assert client.session.headers["Connection"] == "close"
+    assert client.get_pool_metrics()[collection_url]["requests"] == 3
+    assert collection_server.connections == 3
+    client.close()
@@ -0,0 +1,55 @@
+import json
+
+from base64 import urlsafe_b64encode
+from elody.credentials import RefreshingTokenProvider, StaticTokenProvider
+from time import time
+from unittest.mock import MagicMock, patch
+
+
+def _jwt(claims):
+    payload = urlsafe_b64encode(json.dumps(claims).encode()).rstrip(b"=").decode()
+    return f"header.{payload}.signature"
+
+
+def test_static_token_provider_returns_token():
+    provider = StaticTokenProvider("token")
+    provider.invalidate()
+    assert provider.get_token() == "token"
+
+
+def test_refreshing_token_provider_reuses_valid_token():
+    fetch_token = MagicMock(return_value=("token", 3600))
+    provider = RefreshingTokenProvider(fetch_token)
+    assert provider.get_token() == "token"
+    assert provider.get_token() == "token"
+    assert fetch_token.call_count == 1
+
+
+def test_refreshing_token_provider_refreshes_before_expiry():
+    fetch_token = MagicMock(side_effect=[("first", 120), ("second", 120)])
+    provider = RefreshingTokenProvider(fetch_token, refresh_margin=60)
+    with patch("elody.credentials.monotonic", return_value=1000):
+        assert provider.get_token() == "first"
+    with patch("elody.credentials.monotonic", return_value=1059):
+        assert provider.get_token() == "first"
+    with patch("elody.credentials.monotonic", return_value=1060):
+        assert provider.get_token() == "second"
+
+
+def test_refreshing_token_provider_reads_jwt_expiry():
+    token = _jwt({"exp": time() + 30})
+    fetch_token = MagicMock(return_value=token)
+    provider = RefreshingTokenProvider(fetch_token, refresh_margin=60)
+    assert provider.get_token() == token
+    assert provider.get_token() == token
+    assert fetch_token.call_count == 2
+
+
+def test_refreshing_token_provider_keeps_token_without_expiry():
+    fetch_token = MagicMock(return_value="opaque")
+    provider = RefreshingTokenProvider(fetch_token)
+    provider.get_token()
+    provider.get_token()
+    provider.invalidate()
+    provider.get_token()
+    assert fetch_token.call_count == 2
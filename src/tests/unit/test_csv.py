@@ -4,6 +4,10 @@ from elody.exceptions import (
     InvalidValueException,
 )
 from elody.csv import CSVMultiObject
+from dateutil import parser
+from datetime import datetime
+from io import StringIO
+from unittest.mock import patch
 
 sample_basic_csv_digipolis = """external_id,external_system,type,file_source,file_identifier,asset_copyright_color,mediafile_copyright_color,photographer,license
 tg:lhaq:8363:m1,arches,asset,file,meeuw.jpg,orange,red,Jos,test
@@ -223,9 +227,10 @@ expected_only_entities_object_vliz = {
 }
 
 
-def init_digipolis_csv_object(csv):
+def init_digipolis_csv_object(csv, **kwargs):
     csv_multi_object = CSVMultiObject(
         csv,
+        **kwargs,
         index_mapping={
             "entities": "external_id",
             "?mediafiles": "file_identifier",
@@ -284,9 +289,10 @@ def init_digipolis_csv_object(csv):
     return csv_multi_object
 
 
-def init_vliz_csv_object(csv):
+def init_vliz_csv_object(csv, **kwargs):
     csv_multi_object = CSVMultiObject(
         csv,
+        **kwargs,
         index_mapping={"entities": "same_entity", "?mediafiles": "filename"},
         object_field_mapping={
             "mediafiles": [
@@ -407,3 +413,247 @@ def test_multiple_keywords_csv_vliz():
 def test_csv_with_only_an_entity_vliz():
     csv_multi_object = init_vliz_csv_object(sample_csv_without_mediafile_vliz)
     assert csv_multi_object.objects == expected_only_entities_object_vliz
+
+
+# Tests CSVMultiObject streaming
+def _group_streamed_objects(streamed_objects):
+    objects = dict()
+    for object_type, object in streamed_objects:
+        objects.setdefault(object_type, list()).append(object)
+    return objects
+
+
+def test_streamed_csv_digipolis_matches_serial():
+    csv_multi_object = init_digipolis_csv_object(
+        None, csvfile=StringIO(sample_meemoo_csv_digipolis), stream=True
+    )
+    assert csv_multi_object.objects == {}
+    streamed_objects = csv_multi_object.iter_objects(flush_column="external_id")
+    assert (
+        _group_streamed_objects(streamed_objects) == expected_meemoo_objects_digipolis
+    )
+
+
+def test_streamed_csv_vliz_flushes_completed_groups():
+    second_entity = sample_multiple_keywords_csv_vliz.splitlines()[1].replace(
+        "1,", "2,", 1
+    )
+    csv_multi_object = init_vliz_csv_object(
+        None,
+        csvfile=StringIO(sample_multiple_keywords_csv_vliz + second_entity),
+        stream=True,
+    )
+    streamed_objects = csv_multi_object.iter_objects(flush_column="same_entity")
+    assert next(streamed_objects) == (
+        "entities",
+        expected_multiple_keywords_objects_vliz["entities"][0],
+    )
+    assert [
+        (object_type, object["matching_id"]) for object_type, object in streamed_objects
+    ] == [("mediafiles", "1"), ("entities", "2"), ("mediafiles", "2")]
+
+
+def test_streamed_csv_keeps_bookkeeping_bounded():
+    csv = "id,type,color\n" + "".join(
+        f"{index},asset,purple\n" for index in range(1, 201)
+    )
+    csv_multi_object = CSVMultiObject(
+        None,
+        index_mapping={"entities": "id"},
+        metadata_field_mapping={
+            "color": {"target": "entities", "value_options": ["green"]}
+        },
+        csvfile=StringIO(csv),
+        stream=True,
+        dialect="excel",
+    )
+    line_numbers = list()
+    for _, object in csv_multi_object.iter_objects(flush_column="id"):
+        assert len(csv_multi_object.get_line_numbers()) <= 2
+        line_numbers.append(
+            csv_multi_object.get_line_number(entity_identifier=object["matching_id"])
+        )
+    assert line_numbers == list(range(1, 201))
+    assert len(csv_multi_object.get_errors()["invalid_value"]) == 200
+
+
+@pytest.mark.parametrize("stream", [False, True])
+def test_streamed_csv_reports_errors_of_invalid_groups(stream):
+    csv_multi_object = CSVMultiObject(
+        None,
+        index_mapping={"entities": "id"},
+        csvfile=StringIO("id,type\n1,\n2,asset\n3,\n4,asset\n"),
+        stream=stream,
+        dialect="excel",
+    )
+    if stream:
+        objects = csv_multi_object.iter_objects(flush_column="id")
+        assert [object["matching_id"] for _, object in objects] == ["2", "4"]
+    errors = csv_multi_object.get_errors()["entities"]
+    assert len(errors) == 2
+    assert errors[0].startswith("entities with index 1 ")
+    assert errors[1].startswith("entities with index 3 ")
+
+
+# Tests CSVParser dialect detection
+class _NonSeekableStream:
+    def __init__(self, text):
+        self.stream = StringIO(text)
+
+    def __iter__(self):
+        return iter(self.stream)
+
+    def read(self, size=-1):
+        return self.stream.read(size)
+
+    def readline(self):
+        return self.stream.readline()
+
+
+def test_csv_from_non_seekable_stream_digipolis():
+    csv_multi_object = init_digipolis_csv_object(
+        None, csvfile=_NonSeekableStream(sample_meemoo_csv_digipolis), sniff_size=16
+    )
+    assert csv_multi_object.objects == expected_meemoo_objects_digipolis
+
+
+def test_csv_with_explicit_dialect_vliz():
+    with patch("elody.csv.csv.Sniffer") as sniffer:
+        csv_multi_object = init_vliz_csv_object(
+            sample_multiple_keywords_csv_vliz, dialect="excel"
+        )
+    sniffer.assert_not_called()
+    assert csv_multi_object.objects == expected_multiple_keywords_objects_vliz
+
+
+def test_csv_sniffs_dialect_from_sample_vliz():
+    csv_multi_object = init_vliz_csv_object(
+        sample_multiple_keywords_csv_vliz.replace(",", ";"), sniff_size=64
+    )
+    assert csv_multi_object.reader.dialect.delimiter == ";"
+    assert csv_multi_object.objects == expected_multiple_keywords_objects_vliz
+
+
+# Tests CSVMultiObject datetime detection
+sample_dates_csv = """id,type,date,title,number
+1,asset,2020-01-02,first,1.5
+2,asset,03/04/2021,second,2
+3,asset,2022-05-06 07:08:09,05/06/2022,3
+"""
+
+
+def init_dates_csv_object(csv, **kwargs):
+    return CSVMultiObject(csv, index_mapping={"entities": "id"}, **kwargs)
+
+
+def _get_metadata_values(csv_multi_object, key):
+    return [
+        metadata["value"]
+        for entity in csv_multi_object.get_entities()
+        for metadata in entity["metadata"]
+        if metadata["key"] == key
+    ]
+
+
+def test_csv_parses_datetimes_once_per_value():
+    with patch("elody.csv.parser.parse", wraps=parser.parse) as parse:
+        csv_multi_object = init_dates_csv_object(sample_dates_csv)
+    assert _get_metadata_values(csv_multi_object, "date") == [
+        datetime(2020, 1, 2),
+        datetime(2021, 3, 4),
+        datetime(2022, 5, 6, 7, 8, 9),
+    ]
+    assert _get_metadata_values(csv_multi_object, "number") == ["1.5", "2", "3"]
+    assert sorted(call.args[0] for call in parse.call_args_list) == [
+        "03/04/2021",
+        "05/06/2022",
+        "first",
+        "second",
+    ]
+
+
+def test_csv_skips_datetime_parsing_for_text_columns():
+    csv_multi_object = init_dates_csv_object(sample_dates_csv, datetime_sample_size=2)
+    assert _get_metadata_values(csv_multi_object, "title") == [
+        "first",
+        "second",
+        "05/06/2022",
+    ]
+    assert csv_multi_object.column_types["title"] == "text"
+    assert csv_multi_object.column_types["date"] == "datetime"
+
+
+def test_csv_parses_datetimes_after_the_sample_by_default():
+    csv = "id,type,date\n"
+    csv += "".join(f"{index},asset,unknown\n" for index in range(1, 151))
+    csv += "151,asset,2021-03-04\n"
+    csv_multi_object = init_dates_csv_object(csv, dialect="excel")
+    assert _get_metadata_values(csv_multi_object, "date")[-1] == datetime(2021, 3, 4)
+    csv_multi_object = init_dates_csv_object(
+        csv, dialect="excel", datetime_sample_size=100
+    )
+    assert _get_metadata_values(csv_multi_object, "date")[-1] == "2021-03-04"
+
+
+def test_csv_parses_configured_datetime_formats():
+    csv_multi_object = init_dates_csv_object(
+        sample_dates_csv, datetime_formats=["%d/%m/%Y"]
+    )
+    assert _get_metadata_values(csv_multi_object, "date")[1] == datetime(2021, 4, 3)
+
+
+class _TextOnlyCSVMultiObject(CSVMultiObject):
+    def is_datetime(self, value):
+        return False
+
+
+class _DateCSVMultiObject(CSVMultiObject):
+    def parse_datetime(self, value):
+        return super().parse_datetime(value).date().isoformat()
+
+
+@pytest.mark.parametrize(
+    "options", [{}, {"datetime_sample_size": 2}, {"max_workers": 2, "shard_size": 1}]
+)
+def test_csv_subclasses_can_override_datetime_hooks(options):
+    text_csv_object = _TextOnlyCSVMultiObject(
+        sample_dates_csv, index_mapping={"entities": "id"}, **options
+    )
+    assert _get_metadata_values(text_csv_object, "date") == [
+        "2020-01-02",
+        "03/04/2021",
+        "2022-05-06 07:08:09",
+    ]
+    date_csv_object = _DateCSVMultiObject(
+        sample_dates_csv, index_mapping={"entities": "id"}, **options
+    )
+    assert _get_metadata_values(date_csv_object, "date") == [
+        "2020-01-02",
+        "2021-03-04",
+        "2022-05-06",
+    ]
+
+
+# Tests CSVMultiObject parallel parsing
+@pytest.mark.parametrize(
+    "init_csv_object, csv",
+    [
+        (init_digipolis_csv_object, sample_meemoo_csv_digipolis),
+        (init_digipolis_csv_object, sample_basic_csv_digipolis_wrong_values),
+        (init_vliz_csv_object, sample_multiple_keywords_csv_vliz * 3),
+        (init_dates_csv_object, sample_dates_csv),
+    ],
+)
+def test_parallel_csv_matches_serial(init_csv_object, csv):
+    serial_csv_object = init_csv_object(csv)
+    parallel_csv_object = init_csv_object(csv, max_workers=2, shard_size=1)
+    assert parallel_csv_object.objects == serial_csv_object.objects
+    assert parallel_csv_object.errors == serial_csv_object.errors
+    assert parallel_csv_object.line_numbers == serial_csv_object.line_numbers
+
+
+def test_parallel_csv_raises_serial_exceptions():
+    with pytest.raises(ColumnNotFoundException):
+        init_vliz_csv_object(
+            sample_basic_csv_vliz_missing_values, max_workers=2, shard_size=1
+        )
@@ -0,0 +1,39 @@
+from elody.rate_limiter import RateLimiter
+from threading import Thread
+from time import monotonic, sleep
+
+
+def test_rate_limiter_allows_burst_without_waiting():
+    rate_limiter = RateLimiter(rate=1, burst=5)
+    start = monotonic()
+    for _ in range(5):
+        rate_limiter.acquire()
+    assert monotonic() - start < 0.5
+
+
+def test_rate_limiter_waits_for_token():
+    rate_limiter = RateLimiter(rate=20, burst=1)
+    start = monotonic()
+    for _ in range(3):
+        rate_limiter.acquire()
+    assert monotonic() - start >= 0.09
+
+
+def test_rate_limiter_bounds_requests_in_flight():
+    rate_limiter = RateLimiter(max_in_flight=2)
+    in_flight = []
+    max_in_flight = []
+
+    def request():
+        with rate_limiter:
+            in_flight.append(1)
+            max_in_flight.append(len(in_flight))
+            sleep(0.02)
+            in_flight.pop()
+
+    threads = [Thread(target=request) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert max(max_in_flight) <= 2
@@ -0,0 +1,78 @@
+import pytest
+
+from elody.retry import RetryPolicy
+from requests import Response
+from unittest.mock import MagicMock
+
+
+def _response(headers=None):
+    response = MagicMock()
+    response.headers = headers or {}
+    return response
+
+
+@pytest.mark.parametrize(
+    "method, status_code, expected",
+    [
+        ("GET", 503, True),
+        ("get", 429, True),
+        ("PUT", 502, True),
+        ("GET", None, True),
+        ("GET", 500, False),
+        ("GET", 404, False),
+        ("POST", 503, False),
+        ("PATCH", None, False),
+    ],
+)
+def test_should_retry(method, status_code, expected):
+    policy = RetryPolicy()
+    assert policy.should_retry(method, 1, 0, status_code) is expected
+
+
+def test_should_not_retry_after_max_attempts():
+    policy = RetryPolicy(max_attempts=3)
+    assert policy.should_retry("GET", 2, 0, 503) is True
+    assert policy.should_retry("GET", 3, 0, 503) is False
+
+
+def test_should_not_retry_after_max_elapsed_time():
+    policy = RetryPolicy(max_elapsed_time=10)
+    assert policy.should_retry("GET", 1, 9, 503) is True
+    assert policy.should_retry("GET", 1, 10, 503) is False
+
+
+def test_get_delay_without_jitter_grows_exponentially():
+    policy = RetryPolicy(backoff_factor=1, max_backoff=5, jitter=False)
+    assert [policy.get_delay(attempt) for attempt in range(1, 5)] == [1, 2, 4, 5]
+
+
+def test_get_delay_with_jitter_stays_within_backoff():
+    policy = RetryPolicy(backoff_factor=1, max_backoff=60)
+    for attempt in range(1, 6):
+        assert 0 <= policy.get_delay(attempt) <= 2 ** (attempt - 1)
+
+
+def test_get_delay_honors_retry_after_seconds():
+    policy = RetryPolicy(max_backoff=60)
+    assert policy.get_delay(1, _response({"Retry-After": "7"})) == 7
+    assert policy.get_delay(1, _response({"Retry-After": "120"})) == 60
+
+
+def test_get_delay_honors_retry_after_of_error_response():
+    policy = RetryPolicy(max_backoff=60)
+    response = Response()
+    response.status_code = 503
+    response.headers["Retry-After"] = "30"
+    assert not response
+    assert policy.get_delay(1, response) == 30
+
+
+def test_get_delay_honors_retry_after_date():
+    policy = RetryPolicy(jitter=False)
+    response = _response({"Retry-After": "Wed, 21 Oct 2015 07:28:00 GMT"})
+    assert policy.get_delay(1, response) == 0
+
+
+def test_get_delay_ignores_retry_after_when_disabled():
+    policy = RetryPolicy(backoff_factor=1, jitter=False, respect_retry_after=False)
+    assert policy.get_delay(1, _response({"Retry-After": "7"})) == 1
@@ -0,0 +1,656 @@
+import json
+import pytest
+
+from elody.client import (
+    ADAPTIVE_CHUNK_SIZE,
+    DEFAULT_UPLOAD_CHUNK_SIZE,
+    MAX_UPLOAD_CHUNK_SIZE,
+    MAX_UPLOAD_CHUNKS,
+    MIN_UPLOAD_CHUNK_SIZE,
+    Client,
+)
+from elody.hashing import MD5_STATE_FORMAT, ResumableMD5
+from elody.retry import RetryPolicy
+from hashlib import md5
+from mmap import mmap
+from io import BytesIO, RawIOBase
+from os import makedirs, path, stat, urandom, utime
+from requests import Response
+from requests.exceptions import ChunkedEncodingError, ConnectionError
+from threading import Lock
+from time import sleep
+from unittest.mock import patch
+from urllib.parse import urlparse
+from urllib3.exceptions import ProtocolError
+
+
+class FakeStorageApi:
+    def __init__(self, file=b""):
+        self.file = file
+        self.chunks = dict()
+        self.requests = list()
+        self.completed = None
+        self.aborted = False
+        self.put_errors = dict()
+        self.put_body_types = list()
+        self.file_breaks = list()
+        self.lock = Lock()
+
+    def send(self, request, **kwargs):
+        url = urlparse(request.url)
+        body = bytes(request.body) if request.body is not None else b""
+        with self.lock:
+            self.requests.append((request.method, url.path, request.headers))
+        match request.method, url.path:
+            case "POST", "/entities/entity/mediafiles":
+                return self.__response(request, 201, b'"http://storage/upload?id=mf"')
+            case "POST", "/upload/init-stream":
+                self.chunks.clear()
+                return self.__json(request, 200, {"upload_id": "upload"})
+            case "GET", "/upload/stream-status":
+                return self.__json(
+                    request,
+                    200,
+                    {
+                        "uploaded_chunks": [
+                            {"sequence_number": i, "hash": md5(chunk).hexdigest()}
+                            for i, chunk in list(self.chunks.items())
+                        ]
+                    },
+                )
+            case "POST", "/upload/sign-chunk":
+                sequence_number = json.loads(body)["chunk_sequence"]
+                return self.__json(
+                    request, 200, {"upload_url": f"http://bucket/{sequence_number}"}
+                )
+            case "PUT", _:
+                sequence_number = int(url.path.rsplit("/", 1)[-1])
+                self.put_body_types.append(type(request.body))
+                if error := self.put_errors.pop(sequence_number, None):
+                    if isinstance(error, int):
+                        return self.__response(request, error, b"")
+                    raise error
+                self.chunks[sequence_number] = body
+                response = self.__response(request, 200, b"")
+                response.headers["ETag"] = md5(body).hexdigest()
+                return response
+            case "POST", "/upload/complete-stream":
+                payload = json.loads(body)
+                sequence_numbers = [
+                    chunk["sequence_number"] for chunk in payload["chunks_info"]
+                ]
+                data = b"".join(self.chunks[i] for i in sequence_numbers)
+                self.completed = (
+                    sequence_numbers == list(range(1, len(sequence_numbers) + 1))
+                    and data == self.file
+                    and payload["file_info"]["md5sum"] == md5(data).hexdigest()
+                )
+                return self.__json(request, 201, {"completed": self.completed})
+            case "POST", "/upload/abort-stream":
+                self.aborted = True
+                return self.__json(request, 200, {})
+            case "GET", "/file":
+                start_byte = 0
+                if range_header := request.headers.get("Range"):
+                    start_byte = int(range_header[len("bytes=") : -1])
+                    if start_byte >= len(self.file):
+                        return self.__response(request, 416, b"")
+                response = self.__response(
+                    request, 206 if start_byte else 200, self.file[start_byte:]
+                )
+                if self.file_breaks:
+                    response.raw = BrokenBody(
+                        self.file[start_byte : self.file_breaks.pop(0)]
+                    )
+                response.headers["Content-Length"] = str(len(self.file) - start_byte)
+                return response
+        return self.__response(request, 404, b"")
+
+    def get_puts(self):
+        return [
+            int(url.rsplit("/", 1)[-1])
+            for method, url, _ in self.requests
+            if method == "PUT"
+        ]
+
+    def get_headers(self, method, url):
+        return [
+            headers
+            for request_method, request_url, headers in self.requests
+            if (request_method, request_url) == (method, url)
+        ]
+
+    def __json(self, request, status_code, payload):
+        return self.__response(request, status_code, json.dumps(payload).encode())
+
+    def __response(self, request, status_code, content):
+        response = Response()
+        response.status_code = status_code
+        response.url = request.url
+        response.request = request
+        response.raw = BytesIO(content)
+        return response
+
+
+class BrokenBody:
+    def __init__(self, data):
+        self.data = data
+
+    def close(self):
+        pass
+
+    def stream(self, chunk_size, decode_content=None):
+        for offset in range(0, len(self.data), chunk_size):
+            yield self.data[offset : offset + chunk_size]
+        raise ProtocolError("Connection broken: IncompleteRead")
+
+
+class NonSeekableFile(RawIOBase):
+    def __init__(self, data):
+        self.file = BytesIO(data)
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        return self.file.readinto(buffer)
+
+
+def _client(**kwargs):
+    return Client(
+        "http://collection",
+        "jwt",
+        elody_storage_api_url="http://storage",
+        **{"retry_policy": RetryPolicy(max_attempts=1), **kwargs},
+    )
+
+
+@pytest.fixture
+def file_path(tmp_path):
+    file_path = tmp_path / "file.bin"
+    file_path.write_bytes(urandom(10))
+    return str(file_path)
+
+
+def test_resumable_md5_state_survives_a_restart():
+    data = urandom(1000)
+    md5_state = ResumableMD5()
+    md5_state.update(data[:300])
+    restored_md5_state = ResumableMD5(md5_state.get_state())
+    restored_md5_state.update(memoryview(bytearray(data[300:])))
+    assert restored_md5_state.hexdigest() == md5(data).hexdigest()
+    assert md5_state.hexdigest() == md5(data[:300]).hexdigest()
+
+
+def test_resumable_md5_states_are_tagged_in_the_checkpoint(file_path, tmp_path):
+    checkpoint_path = str(tmp_path / "file.checkpoint")
+    with open(file_path, "rb") as file:
+        storage_api = FakeStorageApi(file.read())
+    storage_api.put_errors[3] = ConnectionError("connection reset")
+    with patch("elody.client.HTTPAdapter.send", storage_api.send):
+        with pytest.raises(ConnectionError):
+            _client().upload_file_from_path(
+                "entity",
+                "file.bin",
+                file_path,
+                chunk_size=3,
+                checkpoint_path=checkpoint_path,
+            )
+        with open(checkpoint_path) as file:
+            checkpoint = json.load(file)
+        assert checkpoint["md5_state_format"] == MD5_STATE_FORMAT
+        checkpoint["md5_state_format"] = "openssl-0-md5-ctx-92"
+        with open(checkpoint_path, "w") as file:
+            json.dump(checkpoint, file)
+
+        hashed_sizes = list()
+        update = ResumableMD5.update
+
+        def hash_chunk(md5_state, data):
+            hashed_sizes.append(len(data))
+            update(md5_state, data)
+
+        with patch.object(ResumableMD5, "update", hash_chunk):
+            _client().upload_file_from_path(
+                "entity",
+                "file.bin",
+                file_path,
+                chunk_size=3,
+                checkpoint_path=checkpoint_path,
+            )
+    assert storage_api.completed
+    assert sum(hashed_sizes) == 10
+    assert storage_api.get_puts() == [1, 2, 3, 3, 4]
+
+
+def test_upload_from_path_resumes_after_crash(file_path, tmp_path):
+    checkpoint_path = str(tmp_path / "file.checkpoint")
+    with open(file_path, "rb") as file:
+        storage_api = FakeStorageApi(file.read())
+    storage_api.put_errors[3] = ConnectionError("connection reset")
+    with patch("elody.client.HTTPAdapter.send", storage_api.send):
+        with pytest.raises(ConnectionError):
+            _client().upload_file_from_path(
+                "entity",
+                "file.bin",
+                file_path,
+                chunk_size=3,
+                checkpoint_path=checkpoint_path,
+            )
+        assert not storage_api.aborted
+        with open(checkpoint_path) as file:
+            assert list(json.load(file)["md5_states"]) == ["2"]
+
+        hashed_sizes = list()
+        update = ResumableMD5.update
+
+        def hash_chunk(md5_state, data):
+            hashed_sizes.append(len(data))
+            update(md5_state, data)
+
+        with patch.object(ResumableMD5, "update", hash_chunk):
+            _client().upload_file_from_path(
+                "entity",
+                "file.bin",
+                file_path,
+                chunk_size=3,
+                checkpoint_path=checkpoint_path,
+            )
+    assert storage_api.completed
+    assert storage_api.get_puts() == [1, 2, 3, 3, 4]
+    assert sum(hashed_sizes) == 4
+    assert not path.exists(checkpoint_path)
+
+
+@pytest.mark.parametrize("replace_file", ["other_path", "modified"])
+def test_upload_from_path_does_not_resume_a_different_file(
+    file_path, tmp_path, replace_file
+):
+    checkpoint_path = str(tmp_path / "file.checkpoint")
+    storage_api = FakeStorageApi()
+    storage_api.put_errors[3] = ConnectionError("connection reset")
+    with patch("elody.client.HTTPAdapter.send", storage_api.send):
+        with pytest.raises(ConnectionError):
+            _client().upload_file_from_path(
+                "entity",
+                "file.bin",
+                file_path,
+                chunk_size=3,
+                checkpoint_path=checkpoint_path,
+            )
+        if replace_file == "other_path":
+            file_path = str(tmp_path / "other" / "file.bin")
+            makedirs(path.dirname(file_path))
+        file_stat = stat(file_path) if path.exists(file_path) else None
+        with open(file_path, "wb") as file:
+            file.write(urandom(10))
+        if file_stat:
+            utime(file_path, ns=(file_stat.st_atime_ns, file_stat.st_mtime_ns + 1))
+        with open(file_path, "rb") as file:
+            storage_api.file = file.read()
+        _client().upload_file_from_path(
+            "entity",
+            "file.bin",
+            file_path,
+            chunk_size=3,
+            checkpoint_path=checkpoint_path,
+        )
+    assert storage_api.completed
+    assert storage_api.get_puts() == [1, 2, 3, 1, 2, 3, 4]
+    assert len(storage_api.get_headers("POST", "/upload/init-stream")) == 2
+
+
+def test_upload_from_url_resumes_after_crash(tmp_path):
+    checkpoint_path = str(tmp_path / "file.checkpoint")
+    storage_api = FakeStorageApi(urandom(10))
+    storage_api.put_errors[3] = ConnectionError("connection reset")
+    with patch("elody.client.HTTPAdapter.send", storage_api.send):
+        with pytest.raises(ConnectionError):
+            _client().upload_file_from_url(
+                "entity",
+                "file.bin",
+                "http://source/file",
+                chunk_size=3,
+                checkpoint_path=checkpoint_path,
+            )
+        _client().upload_file_from_url(
+            "entity",
+            "file.bin",
+            "http://source/file",
+            chunk_size=3,
+            checkpoint_path=checkpoint_path,
+        )
+    assert storage_api.completed
+    assert storage_api.get_puts() == [1, 2, 3, 3, 4]
+    assert [
+        headers.get("Range") for headers in storage_api.get_headers("GET", "/file")
+    ] == [None, "bytes=6-"]
+    assert not path.exists(checkpoint_path)
+
+
+def test_upload_from_url_resumes_after_source_body_breaks(tmp_path):
+    checkpoint_path = str(tmp_path / "file.checkpoint")
+    storage_api = FakeStorageApi(urandom(10))
+    storage_api.file_breaks.append(7)
+    events = list()
+    with patch("elody.client.HTTPAdapter.send", storage_api.send):
+        _client(
+            retry_policy=RetryPolicy(max_attempts=4, backoff_factor=0)
+        ).upload_file_from_url(
+            "entity",
+            "file.bin",
+            "http://source/file",
+            chunk_size=3,
+            checkpoint_path=checkpoint_path,
+            progress_handler=lambda event, data: events.append(event),
+        )
+    assert storage_api.completed
+    assert not storage_api.aborted
+    assert storage_api.get_puts() == [1, 2, 3, 4]
+    assert [
+        headers.get("Range") for headers in storage_api.get_headers("GET", "/file")
+    ] == [None, "bytes=6-"]
+    assert events.count("retry") == 1
+    assert not path.exists(checkpoint_path)
+
+
+def test_upload_from_url_keeps_checkpoint_when_source_body_breaks(tmp_path):
+    checkpoint_path = str(tmp_path / "file.checkpoint")
+    storage_api = FakeStorageApi(urandom(10))
+    storage_api.file_breaks.append(7)
+    with patch("elody.client.HTTPAdapter.send", storage_api.send):
+        with pytest.raises(ChunkedEncodingError):
+            _client().upload_file_from_url(
+                "entity",
+                "file.bin",
+                "http://source/file",
+                chunk_size=3,
+                checkpoint_path=checkpoint_path,
+            )
+    assert not storage_api.aborted
+    assert path.exists(checkpoint_path)
+
+
+def test_upload_from_url_completes_when_only_completion_failed(tmp_path):
+    checkpoint_path = str(tmp_path / "file.checkpoint")
+    storage_api = FakeStorageApi(urandom(9))
+    with patch("elody.client.HTTPAdapter.send", storage_api.send):
+        with patch(
+            "elody.client.Client._Client__complete_upload_stream",
+            side_effect=ConnectionError("connection reset"),
+        ):
+            with pytest.raises(ConnectionError):
+                _client().upload_file_from_url(
+                    "entity",
+                    "file.bin",
+                    "http://source/file",
+                    chunk_size=3,
+                    checkpoint_path=checkpoint_path,
+                )
+        _client().upload_file_from_url(
+            "entity",
+            "file.bin",
+            "http://source/file",
+            chunk_size=3,
+            checkpoint_path=checkpoint_path,
+        )
+    assert storage_api.completed
+    assert storage_api.get_puts() == [1, 2, 3]
+
+
+def test_upload_keeps_checkpoint_on_interrupt(file_path, tmp_path):
+    checkpoint_path = str(tmp_path / "file.checkpoint")
+    storage_api = FakeStorageApi()
+    storage_api.put_errors[2] = KeyboardInterrupt()
+    with patch("elody.client.HTTPAdapter.send", storage_api.send):
+        with pytest.raises(KeyboardInterrupt):
+            _client().upload_file_from_path(
+                "entity",
+                "file.bin",
+                file_path,
+                chunk_size=3,
+                checkpoint_path=checkpoint_path,
+            )
+    assert not storage_api.aborted
+    assert path.exists(checkpoint_path)
+
+
+def test_upload_aborts_and_removes_checkpoint_on_permanent_error(file_path, tmp_path):
+    checkpoint_path = str(tmp_path / "file.checkpoint")
+    storage_api = FakeStorageApi()
+    storage_api.put_errors[2] = 403
+    with patch("elody.client.HTTPAdapter.send", storage_api.send):
+        with pytest.raises(Exception):
+            _client().upload_file_from_path(
+                "entity",
+                "file.bin",
+                file_path,
+                chunk_size=3,
+                checkpoint_path=checkpoint_path,
+            )
+    assert storage_api.aborted
+    assert not path.exists(checkpoint_path)
+
+
+def test_upload_from_path_sends_zero_copy_views(file_path):
+    with open(file_path, "rb") as file:
+        storage_api = FakeStorageApi(file.read())
+    with patch("elody.client.HTTPAdapter.send", storage_api.send):
+        with patch("elody.client.mmap", wraps=mmap) as mapped_file:
+            _client().upload_file_from_path(
+                "entity", "file.bin", file_path, chunk_size=4
+            )
+    assert storage_api.completed
+    assert storage_api.put_body_types == [memoryview] * 3
+    assert mapped_file.call_count == 1
+    assert mapped_file.return_value.closed
+
+
+@pytest.mark.parametrize("max_parallel_chunks", [1, 3])
+def test_upload_from_path_closes_mapped_file_after_failure(
+    file_path, max_parallel_chunks
+):
+    storage_api = FakeStorageApi()
+    storage_api.put_errors[2] = 403
+    mapped_files = list()
+
+    def map_file(*args, **kwargs):
+        mapped_files.append(mmap(*args, **kwargs))
+        return mapped_files[-1]
+
+    with patch("elody.client.HTTPAdapter.send", storage_api.send):
+        with patch("elody.client.mmap", side_effect=map_file):
+            with pytest.raises(Exception):
+                _client().upload_file_from_path(
+                    "entity",
+                    "file.bin",
+                    file_path,
+                    chunk_size=2,
+                    max_parallel_chunks=max_parallel_chunks,
+                )
+    assert storage_api.aborted
+    assert mapped_files[0].closed
+
+
+@pytest.mark.parametrize(
+    "file", [BytesIO(b"0123456789"), NonSeekableFile(b"0123456789")]
+)
+def test_upload_from_fileobj_without_mmap_reads_buffered_chunks(file):
+    storage_api = FakeStorageApi(b"0123456789")
+    with patch("elody.client.HTTPAdapter.send", storage_api.send):
+        _client().upload_file_from_fileobj("entity", "file.bin", file, chunk_size=4)
+    assert storage_api.completed
+    assert storage_api.put_body_types == [bytes] * 3
+
+
+def test_upload_from_non_seekable_fileobj_can_not_resume():
+    storage_api = FakeStorageApi(b"0123456789")
+    storage_api.put_errors[2] = ConnectionError("connection reset")
+    with patch("elody.client.HTTPAdapter.send", storage_api.send):
+        with pytest.raises(ValueError):
+            _client(
+                retry_policy=RetryPolicy(max_attempts=2, backoff_factor=0)
+            ).upload_file_from_fileobj(
+                "entity", "file.bin", NonSeekableFile(b"0123456789"), chunk_size=4
+            )
+    assert storage_api.aborted
+
+
+@pytest.mark.parametrize(
+    "upload_throughput, total_size, expected_chunk_size",
+    [
+        (None, None, DEFAULT_UPLOAD_CHUNK_SIZE),
+        (None, 10, 10),
+        (2 * 1024**2, None, 20 * 1024**2),
+        (1024, None, MIN_UPLOAD_CHUNK_SIZE),
+        (1024**3, None, MAX_UPLOAD_CHUNK_SIZE),
+        (1024, 1024**4, -(-(1024**4) // MAX_UPLOAD_CHUNKS)),
+        (1024**3, 100 * 1024**2, 100 * 1024**2),
+    ],
+)
+def test_adaptive_chunk_size_is_bounded(
+    upload_throughput, total_size, expected_chunk_size
+):
+    client = _client(upload_chunk_size=ADAPTIVE_CHUNK_SIZE)
+    client.upload_throughput = upload_throughput
+    chunk_size = client._Client__get_upload_chunk_size(None, total_size)
+    assert chunk_size == expected_chunk_size
+    if total_size:
+        assert -(-total_size // chunk_size) <= MAX_UPLOAD_CHUNKS
+
+
+def test_explicit_chunk_size_is_not_adapted():
+    client = _client(upload_chunk_size=ADAPTIVE_CHUNK_SIZE)
+    client.upload_throughput = 1024**3
+    assert client._Client__get_upload_chunk_size(1024, 10 * 1024**2) == 1024
+
+
+def test_adaptive_chunk_size_follows_measured_throughput(file_path):
+    with open(file_path, "rb") as file:
+        storage_api = FakeStorageApi(file.read())
+    client = _client(upload_chunk_size=ADAPTIVE_CHUNK_SIZE)
+    with patch("elody.client.HTTPAdapter.send", storage_api.send):
+        with patch("elody.client.perf_counter", side_effect=range(1000)):
+            client.upload_file_from_path("entity", "file.bin", file_path)
+    assert storage_api.completed
+    assert 0 < client.upload_throughput <= 10
+    assert client._Client__get_upload_chunk_size(None, None) == MIN_UPLOAD_CHUNK_SIZE
+
+
+@pytest.mark.parametrize("max_parallel_chunks", [1, 3])
+def test_upload_reports_progress_after_each_put(file_path, max_parallel_chunks):
+    with open(file_path, "rb") as file:
+        storage_api = FakeStorageApi(file.read())
+    events = list()
+    events_lock = Lock()
+
+    def progress_handler(event, data):
+        with events_lock:
+            events.append((event, dict(data), len(storage_api.chunks)))
+
+    with patch("elody.client.HTTPAdapter.send", storage_api.send):
+        _client().upload_file_from_path(
+            "entity",
+            "file.bin",
+            file_path,
+            chunk_size=4,
+            max_parallel_chunks=max_parallel_chunks,
+            progress_handler=progress_handler,
+        )
+    progress = [
+        (data["bytes_sent"], uploaded_chunks)
+        for event, data, uploaded_chunks in events
+        if event == "progress"
+    ]
+    bytes_sent = [bytes_sent for bytes_sent, _ in progress]
+    assert len(bytes_sent) == 3
+    assert bytes_sent == sorted(set(bytes_sent))
+    assert bytes_sent[-1] == 10
+    assert all(
+        uploaded_chunks >= index
+        for index, (_, uploaded_chunks) in enumerate(progress, start=1)
+    )
+    assert all(
+        data["total_size"] == 10 for event, data, _ in events if event == "progress"
+    )
+
+
+class SlowStorageApi(FakeStorageApi):
+    def __init__(self, file=b""):
+        super().__init__(file)
+        self.buffered_chunks = 0
+        self.max_buffered_chunks = 0
+
+    def buffer_chunk(self):
+        with self.lock:
+            self.buffered_chunks += 1
+            self.max_buffered_chunks = max(
+                self.max_buffered_chunks, self.buffered_chunks
+            )
+
+    def send(self, request, **kwargs):
+        if request.method != "PUT":
+            return super().send(request, **kwargs)
+        sleep(0.01)
+        response = super().send(request, **kwargs)
+        with self.lock:
+            self.buffered_chunks -= 1
+        return response
+
+
+@pytest.mark.parametrize("max_parallel_chunks", [2, 4])
+def test_parallel_upload_sends_every_chunk(tmp_path, max_parallel_chunks):
+    file_path = tmp_path / "file.bin"
+    file_path.write_bytes(urandom(100))
+    storage_api = SlowStorageApi(file_path.read_bytes())
+    update = ResumableMD5.update
+
+    def hash_chunk(md5_state, data):
+        storage_api.buffer_chunk()
+        update(md5_state, data)
+
+    with patch("elody.client.HTTPAdapter.send", storage_api.send):
+        with patch.object(ResumableMD5, "update", hash_chunk):
+            _client().upload_file_from_path(
+                "entity",
+                "file.bin",
+                str(file_path),
+                chunk_size=7,
+                max_parallel_chunks=max_parallel_chunks,
+            )
+    assert storage_api.completed
+    assert sorted(storage_api.get_puts()) == list(range(1, 16))
+    assert storage_api.max_buffered_chunks == max_parallel_chunks
+
+
+def test_parallel_upload_aborts_on_failed_put(tmp_path):
+    file_path = tmp_path / "file.bin"
+    file_path.write_bytes(urandom(100))
+    storage_api = SlowStorageApi()
+    storage_api.put_errors[3] = 403
+    with patch("elody.client.HTTPAdapter.send", storage_api.send):
+        with pytest.raises(Exception):
+            _client().upload_file_from_path(
+                "entity",
+                "file.bin",
+                str(file_path),
+                chunk_size=7,
+                max_parallel_chunks=4,
+            )
+    assert storage_api.aborted
+    assert storage_api.completed is None
+    assert len(storage_api.get_puts()) < 15
+
+
+def test_upload_invalidates_the_cached_entity(file_path):
+    with open(file_path, "rb") as file:
+        storage_api = FakeStorageApi(file.read())
+    client = _client(document_cache_size=10, document_cache_ttl=60)
+    client.document_cache.put(
+        ("entities", "entity"), '"1"', {"_id": "entity", "identifiers": ["alias"]}
+    )
+    with patch("elody.client.HTTPAdapter.send", storage_api.send):
+        client.upload_file_from_path("entity", "file.bin", file_path)
+    assert storage_api.completed
+    assert client.document_cache.get(("entities", "entity")) is None
+    assert client.get_document_cache_statistics()["invalidations"] == 1
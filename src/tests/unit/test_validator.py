@@ -0,0 +1,57 @@
+import pytest
+
+from elody.schemas import entity_schema, mediafile_schema
+from elody.validator import get_validator, validate_json, validate_json_batch
+from jsonschema.exceptions import SchemaError, ValidationError
+from jsonschema.validators import validate
+
+
+def test_get_validator_compiles_schema_once():
+    assert get_validator(entity_schema) is get_validator(entity_schema)
+    assert get_validator(entity_schema) is not get_validator(mediafile_schema)
+
+
+def test_get_validator_rejects_invalid_schema():
+    with pytest.raises(SchemaError):
+        get_validator({"type": 1})
+
+
+def test_validate_json_returns_same_message_as_jsonschema():
+    document = {"type": "asset", "metadata": "invalid"}
+    with pytest.raises(ValidationError) as error:
+        validate(instance=document, schema=entity_schema)
+    assert validate_json(document, entity_schema) == error.value.message
+
+
+def test_validate_json_returns_none_for_valid_document():
+    assert validate_json({"type": "asset", "metadata": []}, entity_schema) is None
+
+
+def test_validate_json_batch_returns_errors_by_key():
+    documents = {
+        "0": {"type": "asset", "metadata": []},
+        "1": {"type": "asset", "metadata": "invalid"},
+    }
+    assert list(validate_json_batch(documents, entity_schema).keys()) == ["1"]
+    assert list(validate_json_batch(list(documents.values()), entity_schema)) == [1]
+
+
+def test_validate_json_collects_all_errors_with_paths():
+    document = {"type": 1, "metadata": "invalid"}
+    assert validate_json(document, entity_schema, all_errors=True) == [
+        {"path": "$.metadata", "message": "'invalid' is not of type 'array'"},
+        {"path": "$.type", "message": "1 is not of type 'string'"},
+    ]
+
+
+def test_validate_json_batch_in_parallel_matches_serial():
+    documents = [
+        {"type": "asset", "metadata": [] if index % 3 else "invalid"}
+        for index in range(50)
+    ]
+    serial = validate_json_batch(documents, entity_schema, all_errors=True)
+    parallel = validate_json_batch(
+        documents, entity_schema, all_errors=True, max_workers=2, chunk_size=10
+    )
+    assert parallel == serial
+    assert list(parallel.keys()) == list(range(0, 50, 3))